@@ -2,21 +2,34 @@ import os
 import logging
 import pygame
 from dynaconf import Dynaconf
-from ecs_pattern import EntityManager, SystemManager
+from ecs_pattern import System
+from paho.mqtt.client import Client as MQTTClient
+from pygame import Surface
+from typing import Any, List, Optional
 
 from . import _APP_NAME, _APP_TITLE, _APP_VERSION
+from .assets import MB, AssetManager
+from .backgrounds import BackgroundLibrary
 from .config import VALIDATORS
-from .consts import FPS_MAX
+from .disk_cache import DiskCache
 from .entities import AppState
+from .events import EventQueue
+from .jobs import JobScheduler
+from .profiler import FrameProfiler
+from .render_list import RenderEntityManager
+from .scheduler import ScheduledSystemManager
 from .systems.animation import SysAnimation
 from .systems.boot import SysBoot, SysClock, SysDebug, SysEvents, SysInput
 from .systems.display import SysDisplay
 from .systems.draw import SysDraw
+from .systems.governor import SysGovernor, governor_tick
+from .systems.jobs import SysJobs
 from .systems.scene import SysScene
 from .systems.scene.hass_entities import ENTITIES as HASS_ENTITIES
 from .systems.mqtt import SysMQTT, SysHomeAssistant
 from .systems.preprocess import SysPreprocess
 from .utils import setup_logger
+from .watchdog import FrameWatchdog
 
 os.environ["SDL_VIDEO_CENTERED"] = "1"
 
@@ -28,8 +41,63 @@ config = Dynaconf(
 )
 
 
+def build_app_state(profile: Optional[bool] = None) -> AppState:
+    return AppState(
+        running=True,
+        booting=True,
+        config=config,
+        event_queue=EventQueue(config.general.event_queue_size),
+        assets=AssetManager(
+            budget=config.assets.budget * MB,
+            disk=(
+                DiskCache(config.paths.cache, config.cache.max_age)
+                if config.cache.enabled
+                else None
+            ),
+        ),
+        jobs=JobScheduler(max_defer=config.jobs.max_defer),
+        backgrounds=BackgroundLibrary(
+            config.paths.images_backgrounds,
+            config.paths.cache / "backgrounds.json",
+        ),
+        profiler=FrameProfiler(
+            enabled=config.general.profile if profile is None else profile
+        ),
+    )  # type: ignore[call-arg]
+
+
+def build_systems(
+    entities: RenderEntityManager,
+    screen: Surface,
+    mqtt_client: Optional[MQTTClient] = None,
+    matrix: Optional[Any] = None,
+) -> List[System]:
+    return [
+        # Boot
+        SysBoot(entities, config),
+        SysPreprocess(entities),
+        # Inputs/Control
+        SysEvents(entities),
+        SysClock(entities),
+        SysInput(entities),
+        SysMQTT(entities, client=mqtt_client),
+        SysHomeAssistant(entities, hass_entities=HASS_ENTITIES),
+        # Stage
+        SysScene(entities),
+        SysAnimation(entities),
+        SysGovernor(entities),
+        # Render
+        SysDraw(entities, screen),
+        SysDisplay(entities, screen, matrix=matrix),
+        # Debugging
+        SysDebug(entities),
+        # Background work, in what's left of the frame
+        SysJobs(entities),
+    ]
+
+
 def main():
-    app_state = AppState(running=True, booting=True, config=config)
+    app_state = build_app_state()
 
     setup_logger(config)
     logger = logging.getLogger(__name__)
@@ -41,7 +109,7 @@ def main():
     pygame.display.set_caption(f"{_APP_TITLE} v{_APP_VERSION}")
     clock = pygame.time.Clock()
 
-    entities = EntityManager()
+    entities = RenderEntityManager()
     entities.add(app_state)
 
     screen = pygame.display.set_mode(
@@ -49,35 +117,37 @@ def main():
         pygame.SRCALPHA,
     )
 
-    system_manager = SystemManager(
-        [
-            # Boot
-            SysBoot(entities, config),
-            SysPreprocess(entities),
-            # Inputs/Control
-            SysEvents(entities),
-            SysClock(entities),
-            SysInput(entities),
-            SysMQTT(entities),
-            SysHomeAssistant(entities, hass_entities=HASS_ENTITIES),
-            # Stage
-            SysScene(entities),
-            SysAnimation(entities),
-            # Render
-            SysDraw(entities, screen),
-            SysDisplay(entities, screen),
-            # Debugging
-            SysDebug(entities),
-        ]
+    system_manager = ScheduledSystemManager(
+        build_systems(entities, screen), app_state, profiler=app_state.profiler
     )
     system_manager.start_systems()
 
+    watchdog: Optional[FrameWatchdog] = None
+    if config.watchdog.enabled:
+        watchdog = FrameWatchdog(
+            config.watchdog.budget,
+            config.watchdog.log_file,
+            current_system=system_manager.current_name,
+        )
+        watchdog.start()
+
     while app_state.running:
-        clock.tick(FPS_MAX)
+        with app_state.profiler.timer("clock.tick"):
+            governor_tick(app_state, clock)
+        # Only the frame's work counts towards the budget, not the tick's sleep
+        if watchdog:
+            watchdog.frame_start()
         system_manager.update_systems()
-        pygame.display.flip()
+        with app_state.profiler.timer("display.flip"):
+            pygame.display.flip()
+        if watchdog:
+            watchdog.frame_end()
 
+    if watchdog:
+        watchdog.stop()
     system_manager.stop_systems()
+    if app_state.profiler.enabled:
+        app_state.profiler.log_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+import logging
+from collections import Counter, OrderedDict
+from pygame import Surface
+from typing import Dict, Iterable, Optional, Sequence, Set
+from .disk_cache import DiskCache
+from .sprites.frame_set import CompactFrameSet
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def surfaces_bytes(surfaces: Iterable[Surface]) -> int:
+    # Pixel buffer sizes, pitch includes any row padding
+    return sum(surface.get_pitch() * surface.get_height() for surface in surfaces)
+
+
+def frames_bytes(frames: Sequence[Surface]) -> int:
+    if isinstance(frames, CompactFrameSet):
+        return frames.stored_bytes + surfaces_bytes((frames.frames.surface,))
+    return surfaces_bytes(frames)
+
+
+class AssetManager:
+    """Preprocessed frame sets, loaded on demand within a memory budget.
+
+    Stages acquire() the keys they display and release() them when they are
+    torn down. Missing keys are queued in `requested` for SysPreprocess to
+    render (or read from the disk cache) and store(). When the resident total
+    exceeds the budget, the least recently used keys nobody holds are evicted.
+    """
+
+    frames: Dict[str, Sequence[Surface]]
+    sizes: Dict[str, int]
+    refs: Counter
+    lru: "OrderedDict[str, None]"
+    requested: Set[str]
+
+    def __init__(self, budget: int = 0, disk: Optional[DiskCache] = None) -> None:
+        self.budget = budget  # bytes, 0 is unlimited
+        self.disk = disk
+        self.frames = dict()
+        self.sizes = dict()
+        self.refs = Counter()
+        self.lru = OrderedDict()
+        self.requested = set()
+        self.total = 0
+        self.evictions = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.frames
+
+    def ready(self, keys: Iterable[str]) -> bool:
+        return all(key in self.frames for key in keys)
+
+    def request(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            if key not in self.frames:
+                self.requested.add(key)
+
+    def acquire(self, key: str) -> Optional[Sequence[Surface]]:
+        self.refs[key] += 1
+        self._touch(key)
+        frames = self.frames.get(key)
+        if frames is None:
+            self.requested.add(key)
+        return frames
+
+    def release(self, key: str) -> None:
+        if self.refs[key] > 0:
+            self.refs[key] -= 1
+        self._touch(key)
+        self.evict()
+
+    def get(self, key: str) -> Sequence[Surface]:
+        frames = self.frames[key]
+        self._touch(key)
+        return frames
+
+    def store(self, key: str, frames: Sequence[Surface]) -> None:
+        self.discard(key)
+        self.frames[key] = frames
+        self.sizes[key] = frames_bytes(frames)
+        self.total += self.sizes[key]
+        self.requested.discard(key)
+        self._touch(key)
+        logger.debug(
+            f"assets.store: key={key} frames={len(frames)} size={self.sizes[key] / MB:.1f}MB total={self.total / MB:.1f}MB"
+        )
+        # Not acquired yet, but it was loaded because something is about to
+        self.evict(keep=key)
+
+    def discard(self, key: str) -> None:
+        if key in self.frames:
+            del self.frames[key]
+            self.total -= self.sizes.pop(key)
+
+    def fits(self, size: int = 0) -> bool:
+        return not self.budget or self.total + size <= self.budget
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        if self.fits():
+            return
+        for key in list(self.lru):
+            if self.fits():
+                break
+            if key in self.frames and not self.refs[key] and key != keep:
+                logger.info(
+                    f"assets.evict: key={key} size={self.sizes[key] / MB:.1f}MB total={self.total / MB:.1f}MB budget={self.budget / MB:.0f}MB"
+                )
+                self.discard(key)
+                self.evictions += 1
+        if not self.fits():
+            logger.warning(
+                f"assets.budget: total={self.total / MB:.1f}MB budget={self.budget / MB:.0f}MB, all resident assets are in use"
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            keys=len(self.frames),
+            bytes=self.total,
+            compact_saved=sum(
+                frames.saved_bytes
+                for frames in self.frames.values()
+                if isinstance(frames, CompactFrameSet)
+            ),
+            budget=self.budget,
+            evictions=self.evictions,
+        )
+
+    def _touch(self, key: str) -> None:
+        self.lru[key] = None
+        self.lru.move_to_end(key)
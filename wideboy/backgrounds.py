@@ -0,0 +1,245 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from PIL import Image
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+MANIFEST_VERSION = 1
+MANIFEST_SAVE_EVERY = 200  # new entries, so a long first scan isn't lost
+HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class BackgroundEntry:
+    name: str  # file name within the library directory
+    mtime_ns: int
+    size: int
+    width: int
+    height: int
+    digest: str  # sha256 of the file contents
+
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class BackgroundLibrary:
+    """Indexed directory of background images, for very large collections.
+
+    The manifest of every image's size, mtime, dimensions and content hash is
+    kept on disk, and refresh() rescans the directory on a worker thread,
+    only reading files that are new or changed since. Entries are usable as
+    soon as they are indexed.
+
+    Images are drawn from a shuffled deck, so each one is shown once before
+    any repeats, and copies of the same image (by hash) are only dealt once.
+    Drawing from the deck doesn't depend on the size of the library.
+    """
+
+    entries: Dict[str, BackgroundEntry]
+    deck: List[str]  # names, the end of the list is dealt first
+    in_deck: Set[str]
+    dealt: Set[str]  # digests dealt this round
+
+    def __init__(self, directory: Path, manifest: Path) -> None:
+        self.directory = Path(directory)
+        self.manifest = Path(manifest)
+        self.entries = dict()
+        self.deck = []
+        self.in_deck = set()
+        self.dealt = set()
+        self.digests: Dict[str, str] = dict()  # digest -> name dealt for it
+        self.current: Optional[str] = None
+        self.position = 0  # images dealt so far
+        self._lock = threading.Lock()
+        self._scanner: Optional[threading.Thread] = None
+        self._load_manifest()
+
+    def __len__(self) -> int:
+        # Unique images
+        return len(self.digests)
+
+    def refresh(self) -> None:
+        # Rescan in the background, unless a scan is already running
+        if self._scanner is not None and self._scanner.is_alive():
+            return
+        self._scanner = threading.Thread(
+            target=self._scan, name="wideboy-backgrounds", daemon=True
+        )
+        self._scanner.start()
+
+    def peek(self, count: int) -> List[Path]:
+        # The next images to be dealt, without dealing them
+        with self._lock:
+            names = self._upcoming(count)
+            if len(names) < count:
+                self._new_round()
+                names = self._upcoming(count)
+            return [self.directory / name for name in names]
+
+    def deal(self) -> Optional[Path]:
+        with self._lock:
+            if not self._upcoming(1):
+                self._new_round()
+            if not self._upcoming(1):
+                return None
+            name = self.deck.pop()
+            self.in_deck.discard(name)
+            self.dealt.add(self.entries[name].digest)
+            self.current = name
+            self.position += 1
+            return self.directory / name
+
+    def _dealable(self, name: str) -> bool:
+        # Removed, or replaced by another copy, since it was shuffled in
+        entry = self.entries.get(name)
+        return entry is not None and self.digests.get(entry.digest) == name
+
+    def _upcoming(self, count: int) -> List[str]:
+        # Caller holds the lock. Stale names are dropped as they reach the end
+        while self.deck and not self._dealable(self.deck[-1]):
+            self.in_deck.discard(self.deck.pop())
+        names: List[str] = []
+        for name in reversed(self.deck):
+            if len(names) == count:
+                break
+            if self._dealable(name):
+                names.append(name)
+        return names
+
+    def _new_round(self) -> None:
+        # Caller holds the lock. Shuffled in under what's left of this round,
+        # without repeating the last image straight away
+        fresh = [name for name in self.digests.values() if name not in self.in_deck]
+        if not fresh:
+            return  # everything is still to come this round
+        self.dealt.clear()
+        random.shuffle(fresh)
+        if len(fresh) > 1 and fresh[-1] == self.current:
+            fresh[0], fresh[-1] = fresh[-1], fresh[0]
+        self.deck = fresh + self.deck
+        self.in_deck.update(fresh)
+
+    def _add(self, entry: BackgroundEntry, shuffle_in: bool = True) -> None:
+        # Caller holds the lock
+        previous = self.entries.get(entry.name)
+        if previous is not None:
+            self._remove(entry.name)
+        self.entries[entry.name] = entry
+        if entry.digest in self.digests:
+            return  # a copy of an image already in the library
+        self.digests[entry.digest] = entry.name
+        if entry.digest in self.dealt or entry.name in self.in_deck:
+            return
+        # Dealt later this round
+        index = random.randint(0, len(self.deck)) if shuffle_in else len(self.deck)
+        self.deck.insert(index, entry.name)
+        self.in_deck.add(entry.name)
+
+    def _remove(self, name: str) -> None:
+        # Caller holds the lock
+        entry = self.entries.pop(name)
+        if self.digests.get(entry.digest) == name:
+            del self.digests[entry.digest]
+            # Promote another copy, if there is one
+            for other in self.entries.values():
+                if other.digest == entry.digest:
+                    self.digests[entry.digest] = other.name
+                    break
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(self.manifest) as f:
+                manifest = json.load(f)
+            if manifest.get("version") != MANIFEST_VERSION or manifest.get(
+                "directory"
+            ) != str(self.directory):
+                return
+            entries = [BackgroundEntry(**entry) for entry in manifest["entries"]]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"backgrounds.manifest: path={self.manifest} error={e}")
+            return
+        with self._lock:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                self._add(entry, shuffle_in=False)
+            random.shuffle(self.deck)
+        logger.info(
+            f"backgrounds.manifest: path={self.manifest} entries={len(self.entries)} unique={len(self.digests)}"
+        )
+
+    def _save_manifest(self) -> None:
+        with self._lock:
+            entries = [asdict(entry) for entry in self.entries.values()]
+        manifest = dict(
+            version=MANIFEST_VERSION, directory=str(self.directory), entries=entries
+        )
+        try:
+            self.manifest.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.manifest)
+        except OSError as e:
+            logger.warning(f"backgrounds.manifest: path={self.manifest} error={e}")
+
+    def _scan(self) -> None:
+        try:
+            files = {
+                item.name: item.stat()
+                for item in os.scandir(self.directory)
+                if item.is_file() and item.name.lower().endswith(BACKGROUND_EXTENSIONS)
+            }
+        except OSError as e:
+            logger.warning(f"backgrounds.scan: path={self.directory} error={e}")
+            return
+        with self._lock:
+            removed = [name for name in self.entries if name not in files]
+            for name in removed:
+                self._remove(name)
+            known = {
+                name: (entry.mtime_ns, entry.size)
+                for name, entry in self.entries.items()
+            }
+        changed = len(removed)
+        for name, stat in sorted(files.items()):
+            if known.get(name) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            path = self.directory / name
+            try:
+                with Image.open(path) as image:
+                    width, height = image.size
+                entry = BackgroundEntry(
+                    name,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    width,
+                    height,
+                    file_sha256(path),
+                )
+            except OSError as e:
+                logger.warning(f"backgrounds.scan: path={path} error={e}")
+                continue
+            with self._lock:
+                self._add(entry)
+            changed += 1
+            if changed % MANIFEST_SAVE_EVERY == 0:
+                self._save_manifest()
+        if changed:
+            self._save_manifest()
+        logger.info(
+            f"backgrounds.scan: path={self.directory} entries={len(self.entries)} unique={len(self.digests)} changed={changed}"
+        )
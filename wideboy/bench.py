@@ -0,0 +1,159 @@
+"""Headless whole-app throughput benchmark.
+
+Boots the real system stack against a dummy SDL video driver, a stub MQTT
+client and a fake LED matrix driver, forces a scene mode and runs frames
+uncapped. Results are printed as JSON:
+
+    python -m wideboy.bench --scene vinyl --frames 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("WIDEBOY_MQTT__HOST", "localhost")
+
+import pygame  # noqa: E402
+from typing import Any, Dict  # noqa: E402
+from .__main__ import build_app_state, build_systems, config  # noqa: E402
+from .profiler import RollingHistogram  # noqa: E402
+from .render_list import RenderEntityManager  # noqa: E402
+from .scheduler import ScheduledSystemManager  # noqa: E402
+from .utils import setup_logger  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+SCENE_MODES = ["default", "city", "diffusion", "galaxy", "vinyl"]
+BOOT_FRAMES_MAX = 10000
+
+
+class StubMQTTClient:
+    """Accepts every paho call the systems make and never touches the network"""
+
+    on_connect = None
+    on_disconnect = None
+    on_message = None
+
+    def __getattr__(self, name: str) -> Any:
+        return lambda *args, **kwargs: None
+
+
+class FakeFrameCanvas:
+    def SetImage(self, image: Any) -> None:
+        pass
+
+
+class FakeMatrix:
+    """Stands in for rgbmatrix.RGBMatrix so the display path still converts frames"""
+
+    brightness: float = 100
+
+    def CreateFrameCanvas(self) -> FakeFrameCanvas:
+        return FakeFrameCanvas()
+
+    def SwapOnVSync(self, canvas: FakeFrameCanvas) -> FakeFrameCanvas:
+        return canvas
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run(scene: str, frames: int, warmup: int, profile: bool) -> Dict[str, Any]:
+    app_state = build_app_state(profile=profile)
+    app_state.scene_mode = scene
+
+    pygame.init()
+    pygame.mixer.quit()
+    entities = RenderEntityManager()
+    entities.add(app_state)
+    screen = pygame.display.set_mode(
+        (config.display.canvas.width, config.display.canvas.height), pygame.SRCALPHA
+    )
+    system_manager = ScheduledSystemManager(
+        build_systems(
+            entities,
+            screen,
+            mqtt_client=StubMQTTClient(),  # type: ignore[arg-type]
+            matrix=FakeMatrix(),
+        ),
+        app_state,
+        profiler=app_state.profiler,
+    )
+    system_manager.start_systems()
+
+    def step() -> None:
+        system_manager.update_systems()
+        pygame.display.flip()
+
+    boot_start = time.perf_counter()
+    boot_frames = 0
+    while app_state.booting and boot_frames < BOOT_FRAMES_MAX:
+        step()
+        boot_frames += 1
+    boot_secs = time.perf_counter() - boot_start
+    # Don't measure frames while other stages' assets load in the background
+    while app_state.preloading and boot_frames < BOOT_FRAMES_MAX:
+        step()
+        boot_frames += 1
+    preload_secs = time.perf_counter() - boot_start
+
+    for _ in range(warmup):
+        step()
+
+    histogram = RollingHistogram(frames)
+    bench_start = time.perf_counter_ns()
+    for _ in range(frames):
+        frame_start = time.perf_counter_ns()
+        step()
+        histogram.add(time.perf_counter_ns() - frame_start)
+    bench_secs = (time.perf_counter_ns() - bench_start) / 1e9
+
+    system_manager.stop_systems()
+    frame_stats = histogram.summary()
+    result = dict(
+        scene=scene,
+        frames=frames,
+        boot_frames=boot_frames,
+        boot_secs=round(boot_secs, 3),
+        preload_secs=round(preload_secs, 3),
+        fps=round(frames / bench_secs, 2) if bench_secs else 0.0,
+        frame_ms={k: round(v, 3) for k, v in frame_stats.items() if k != "n"},
+        peak_rss_mb=round(peak_rss_mb(), 1),
+    )
+    if profile:
+        result["systems"] = {
+            name: {k: round(v, 3) for k, v in stats.items()}
+            for name, stats in app_state.profiler.summary().items()
+        }
+        result["counts"] = {
+            name: {k: round(v, 3) for k, v in stats.items()}
+            for name, stats in app_state.profiler.count_summary().items()
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="wideboy.bench", description=__doc__)
+    parser.add_argument("--scene", choices=SCENE_MODES, default="default")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--profile", action="store_true", help="per-system timings")
+    args = parser.parse_args()
+
+    setup_logger(config)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    result = run(args.scene, args.frames, args.warmup, args.profile)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ from dataclasses import field
 from ecs_pattern import component
 from pygame import Surface
 from pygame.sprite import Sprite
-from typing import List, Optional, Tuple
+from typing import Optional, Sequence, Tuple
+from .sprites.gif_stream import GifStream
 
 
 @component
@@ -16,7 +17,7 @@ class ComVisible:
 
 @component
 class ComAlpha:
-    alpha: int = 255
+    alpha: int = 255  # applied when drawn, the sprite image is left as it is
 
 
 @component
@@ -25,6 +26,8 @@ class ComMotion:
     speed_y: int = 0
     direction_x: int = 0
     direction_y: int = 0
+    offset_x: float = 0.0  # sub-pixel carry for time-based motion
+    offset_y: float = 0.0
 
 
 @component
@@ -44,12 +47,20 @@ class ComBound:
 class ComFade:
     fade_target_alpha: Optional[int] = None
     fade_speed: int = 8
+    fade_offset: float = 0.0
 
 
 @component
 class ComFrame:
-    frames: List[Surface] = field(default_factory=list)
+    frames: Sequence[Surface] = field(default_factory=list)  # or CompactFrames
     scene_frame: int = 0
     frame_index: int = 0
     frame_direction: int = 1
     frame_delay: int = 1
+    frame_elapsed: float = 0.0
+    frame_stream: Optional[GifStream] = None  # frames (and durations) come from here
+
+
+@component
+class ComMode7:
+    rotation_speed: float = 0.0  # degrees per frame at FPS_MAX, sprite is a Mode7Sprite
@@ -0,0 +1,361 @@
+import bisect
+import logging
+from dataclasses import dataclass, field
+from ecs_pattern import entity
+from pygame import BLEND_PREMULTIPLIED, BLEND_RGBA_MULT, Rect, Surface, SRCALPHA
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+COMPOSITOR_FULL_REDRAW = 0.5  # damaged fraction of the canvas to redraw it all
+COMPOSITOR_LAYERS = (5, 100)  # background, stage sprites, clock and tiles
+LAYER_BUSY = 2  # frames in a row a layer changes before it's drawn direct
+LAYER_SETTLE = 50  # frames in a row unchanged before it's cached again
+
+
+@dataclass
+class Drawn:
+    entity: Any  # kept so its id() isn't reused while it's tracked
+    rect: Rect
+    image: Surface
+    alpha: Optional[int]  # the image's own surface alpha
+    opacity: int = 255  # the entity's alpha, applied on top when drawn
+    frame: int = 0  # last frame it was visible in
+    z_order: int = 0  # restacking damages it, even within its layer
+    layer: int = 0
+    faded: Optional[Surface] = None  # image with opacity applied, if below 255
+    premultiplied: Optional[Surface] = None  # source, for drawing to upper layers
+
+    def changed(
+        self,
+        x: int,
+        y: int,
+        image: Surface,
+        alpha: Optional[int],
+        opacity: int,
+        z_order: int,
+    ) -> bool:
+        rect = self.rect
+        return (
+            self.image is not image
+            or self.alpha != alpha
+            or self.opacity != opacity
+            or self.z_order != z_order
+            or rect.x != x
+            or rect.y != y
+            or rect.size != image.get_size()
+        )
+
+    def source(self) -> Surface:
+        # What to blit. Images can be shared between entities, e.g. animation
+        # frames, so opacity goes on a copy rather than the image itself
+        if self.opacity >= 255:
+            return self.image
+        if self.faded is None:
+            alpha = 255 if self.alpha is None else self.alpha
+            self.faded = self.image.copy()
+            self.faded.set_alpha(alpha * self.opacity // 255)
+        return self.faded
+
+
+@dataclass
+class Layer:
+    z_min: Optional[int]  # lowest z_order drawn in it, None for the bottom layer
+    members: List[Drawn] = field(default_factory=list)  # this frame's, in z-order
+    damage: List[Rect] = field(default_factory=list)
+    surface: Optional[Surface] = None  # cached, None while drawn direct
+    busy: int = 0  # frames in a row it changed
+    quiet: int = 0  # frames in a row it didn't
+    area: int = 0  # pixels recomposited into the cache
+
+
+def premultiply(image: Surface) -> Surface:
+    # Per pixel and surface alpha both folded into the colour channels
+    if not image.get_flags() & SRCALPHA:
+        image = image.convert_alpha()
+    alpha = image.get_alpha()
+    premultiplied = image.premul_alpha()
+    if alpha is not None and alpha < 255:
+        # set_alpha(None) would drop the per pixel alpha too
+        premultiplied.set_alpha(255)
+        premultiplied.fill((alpha, alpha, alpha, alpha), special_flags=BLEND_RGBA_MULT)
+    return premultiplied
+
+
+def merge_rects(rects: Iterable[Rect]) -> List[Rect]:
+    # Overlapping rects are combined, so no area is redrawn twice
+    merged: List[Rect] = []
+    for rect in rects:
+        rect = Rect(rect)
+        while (index := rect.collidelist(merged)) >= 0:
+            rect.union_ip(merged.pop(index))
+        merged.append(rect)
+    return merged
+
+
+class Compositor:
+    """Draws visible entities to the canvas, redrawing only what changed.
+
+    The rect, image and alpha each entity was drawn with are recorded, and an
+    entity that moved, changed image or alpha, appeared or disappeared damages
+    both the area it was drawn to and the area it's drawn to now. Each
+    damaged area is cleared and redrawn by every entity overlapping it, in
+    z-order, blitting only the part of each image inside the area. Entities
+    entirely off the canvas are culled.
+
+    Entities are split into layers by z-order band. A layer that rarely
+    changes, like the background or the clock, is composited into its own
+    cached surface and the canvas is merged from those, so a busy sprite
+    between them costs three blits per damaged area however many entities
+    are under and over it. A layer that changes every frame, like an
+    animated sprite, would be composited twice, so it's drawn straight to
+    the canvas until it settles. Without bands nothing is cached.
+
+    Cached layers above the opaque bottom one are kept premultiplied, as
+    blending translucent images into a transparent surface and that onto the
+    canvas only matches blending them straight onto the canvas if it is.
+
+    An entity's alpha (ComAlpha) is an instance property applied when it's
+    drawn, on top of any alpha its image has, so it never changes the image.
+
+    Sprites that draw into their own image in place set a dirty attribute, as
+    on pygame's DirtySprite: 1 is redrawn once, then reset, 2 every frame.
+    """
+
+    drawn: Dict[int, Drawn]  # id(entity) -> what it was last drawn with
+    layers: List[Layer]  # bottom first
+
+    def __init__(
+        self,
+        screen: Surface,
+        full_redraw: float = COMPOSITOR_FULL_REDRAW,
+        bands: Sequence[int] = COMPOSITOR_LAYERS,
+    ) -> None:
+        self.screen = screen
+        self.bounds = screen.get_rect()
+        self.full_redraw = full_redraw
+        self.bands = sorted(set(bands))
+        self.layers = [Layer(None)] + [Layer(z_min) for z_min in self.bands]
+        self.drawn = dict()
+        self.invalid = True
+        self.frames = 0
+        self.full_frames = 0
+        self.skipped_frames = 0
+        self.area = 0  # pixels redrawn
+        self.culled = 0  # entities off the canvas, this frame
+        self.clipped = 0  # entities partly off the canvas, this frame
+        self.culled_total = 0
+        self.clipped_total = 0
+
+    def invalidate(self) -> None:
+        # Redraw the whole canvas next frame, e.g. after something else drew to it
+        self.invalid = True
+
+    def draw(self, entities: Iterable[entity]) -> List[Rect]:
+        # Entities in z-order, returns the damaged areas of the canvas
+        self._track(entities)
+        bounds = self.bounds
+        canvas = bounds.w * bounds.h
+        damage: List[Rect] = []
+        for layer in self.layers:
+            rects = merge_rects(
+                rect.clip(bounds) for rect in layer.damage if rect.colliderect(bounds)
+            )
+            if (
+                self.invalid
+                or sum(r.w * r.h for r in rects) >= canvas * self.full_redraw
+            ):
+                rects = [Rect(bounds)]
+            layer.damage = rects
+            if self.bands:
+                self._cache(layer)
+            damage.extend(rects)
+        self.invalid = False
+
+        damage = merge_rects(damage)
+        area = sum(rect.w * rect.h for rect in damage)
+        if area >= canvas * self.full_redraw:
+            damage = [Rect(bounds)]
+            area = canvas
+            self.full_frames += 1
+        elif not damage:
+            self.skipped_frames += 1
+        self.frames += 1
+        self.area += area
+
+        for clip in damage:
+            self._merge(clip)
+        return damage
+
+    def _merge(self, clip: Rect) -> None:
+        # Cached layers are copied over, the rest drawn straight to the canvas
+        screen = self.screen
+        for layer in self.layers:
+            bottom = layer.z_min is None
+            if layer.surface is None:
+                if bottom:
+                    screen.fill((0, 0, 0), clip)
+                self._blit(screen, layer.members, clip)
+            elif bottom:
+                screen.blit(layer.surface, clip, clip)
+            elif layer.members:
+                # Empty layers are all transparent
+                screen.blit(
+                    layer.surface, clip, clip, special_flags=BLEND_PREMULTIPLIED
+                )
+
+    def _cache(self, layer: Layer) -> None:
+        # Keeps the layer's surface up to date, or drops it while it's busy
+        if layer.damage:
+            layer.busy += 1
+            layer.quiet = 0
+        else:
+            layer.busy = 0
+            layer.quiet += 1
+        rects = layer.damage
+        if layer.surface is None:
+            if layer.quiet < LAYER_SETTLE:
+                return
+            bottom = layer.z_min is None
+            layer.surface = (
+                Surface(self.bounds.size)
+                if bottom
+                else Surface(self.bounds.size, SRCALPHA)
+            )
+            rects = [Rect(self.bounds)]
+        elif layer.busy >= LAYER_BUSY:
+            layer.surface = None
+            return
+        for clip in rects:
+            layer.surface.fill((0, 0, 0) if layer.z_min is None else (0, 0, 0, 0), clip)
+            self._blit(
+                layer.surface,
+                layer.members,
+                clip,
+                premultiplied=layer.z_min is not None,
+            )
+            layer.area += clip.w * clip.h
+
+    def _blit(
+        self,
+        surface: Surface,
+        members: List[Drawn],
+        clip: Rect,
+        premultiplied: bool = False,
+    ) -> None:
+        # Members in z-order, only the parts of them inside clip
+        flags = BLEND_PREMULTIPLIED if premultiplied else 0
+        for member in members:
+            rect = member.rect
+            if not rect.colliderect(clip):
+                continue
+            if premultiplied:
+                if member.premultiplied is None:
+                    member.premultiplied = premultiply(member.source())
+                image = member.premultiplied
+            else:
+                image = member.source()
+            if clip.contains(rect):
+                surface.blit(image, rect, special_flags=flags)
+            else:
+                visible = rect.clip(clip)
+                area = visible.move(-rect.x, -rect.y)
+                surface.blit(image, visible, area, special_flags=flags)
+
+    def _track(self, entities: Iterable[entity]) -> None:
+        # Updates the records of what is drawn, and each layer's damaged areas.
+        # Records are updated in place, so a static scene allocates nothing
+        drawn = self.drawn
+        layers = self.layers
+        for layer in layers:
+            layer.members.clear()
+            layer.damage = []
+        bands = self.bands
+        bounds = self.bounds
+        frame = self.frames
+        seen = culled = clipped = 0
+        for e in entities:
+            if e.hidden:
+                continue
+            seen += 1
+            index = bisect.bisect_right(bands, e.z_order)
+            record = self._record(e, index)
+            rect = record.rect
+            record.frame = frame
+            if record.opacity <= 0:
+                continue  # nothing to draw, but it damages when it fades in
+            if not rect.colliderect(bounds):
+                culled += 1
+                continue
+            if not bounds.contains(rect):
+                clipped += 1
+            layers[index].members.append(record)
+        if seen != len(drawn):
+            self._forget(frame)
+        self.culled, self.clipped = culled, clipped
+        self.culled_total += culled
+        self.clipped_total += clipped
+
+    def _record(self, e: entity, index: int) -> Drawn:
+        # The entity's record, damaging its layers if it changed
+        sprite = e.sprite
+        image = sprite.image
+        alpha = image.get_alpha()
+        opacity = getattr(e, "alpha", 255)
+        dirty = getattr(sprite, "dirty", 0)
+        if dirty == 1:
+            sprite.dirty = 0
+        record = self.drawn.get(id(e))
+        if record is None:
+            rect = Rect((e.x, e.y), image.get_size())
+            record = self.drawn[id(e)] = Drawn(
+                e, rect, image, alpha, opacity, z_order=e.z_order, layer=index
+            )
+            self.layers[index].damage.append(rect)
+        elif dirty or record.changed(e.x, e.y, image, alpha, opacity, e.z_order):
+            self._move(record, e.x, e.y, image, alpha, opacity, index)
+            record.z_order = e.z_order
+        return record
+
+    def _forget(self, frame: int) -> None:
+        # Entities hidden or removed since the last frame
+        drawn = self.drawn
+        for key in [key for key, record in drawn.items() if record.frame != frame]:
+            record = drawn.pop(key)
+            self.layers[record.layer].damage.append(record.rect)
+
+    def _move(
+        self,
+        record: Drawn,
+        x: int,
+        y: int,
+        image: Surface,
+        alpha: Optional[int],
+        opacity: int,
+        layer: int,
+    ) -> None:
+        # Damages where it was drawn and where it will be
+        rect = record.rect
+        self.layers[record.layer].damage.append(Rect(rect))
+        rect.update((x, y), image.get_size())
+        record.image = image
+        record.alpha = alpha
+        record.opacity = opacity
+        record.layer = layer
+        record.faded = None
+        record.premultiplied = None
+        self.layers[layer].damage.append(rect)
+
+    def stats(self) -> Dict[str, Any]:
+        canvas = self.bounds.w * self.bounds.h * self.frames
+        return dict(
+            frames=self.frames,
+            full=self.full_frames,
+            skipped=self.skipped_frames,
+            redrawn=round(self.area / canvas if canvas else 0, 3),
+            cached=[
+                round(layer.area / canvas if canvas else 0, 3) for layer in self.layers
+            ],
+            culled=round(self.culled_total / self.frames if self.frames else 0, 1),
+            clipped=round(self.clipped_total / self.frames if self.frames else 0, 1),
+        )
@@ -6,6 +6,9 @@ VALIDATORS = [
     Validator("GENERAL__DEVICE_ID", default=None),
     Validator("GENERAL__DEBUG", default=False, cast=bool),
     Validator("GENERAL__LOG_LEVEL", default="info"),  # error, warning, info, debug
+    Validator("GENERAL__EVENT_QUEUE_SIZE", default=4096, cast=int),
+    Validator("GENERAL__TIME_BASED_ANIMATION", default=True, cast=bool),
+    Validator("GENERAL__PROFILE", default=False, cast=bool),
     # Display
     Validator(
         "DISPLAY__CANVAS__WIDTH",
@@ -17,6 +20,36 @@ VALIDATORS = [
         default=64,
         cast=int,
     ),
+    Validator(
+        "DISPLAY__GOVERNOR__ENABLED",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "DISPLAY__GOVERNOR__FPS_IDLE",
+        default=4,
+        cast=int,
+    ),
+    Validator(
+        "DISPLAY__GOVERNOR__IDLE_DELAY",
+        default=0.5,
+        cast=float,
+    ),
+    Validator(
+        "DISPLAY__COMPOSITOR__DAMAGE",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "DISPLAY__COMPOSITOR__FULL_REDRAW",
+        default=0.5,
+        cast=float,
+    ),
+    Validator(
+        "DISPLAY__COMPOSITOR__LAYERS",
+        default=[5, 100],
+        cast=list,
+    ),
     # MQTT
     Validator(
         "MQTT__HOST",
@@ -58,11 +91,118 @@ VALIDATORS = [
         default=60,
         cast=int,
     ),
+    Validator(
+        "MQTT__RECONNECT_MIN_DELAY",
+        default=1,
+        cast=int,
+    ),
+    Validator(
+        "MQTT__RECONNECT_MAX_DELAY",
+        default=60,
+        cast=int,
+    ),
     Validator(
         "MQTT__LOG_MESSAGES",
         default=False,
         cast=bool,
     ),
+    # SCHEDULER
+    Validator(
+        "SCHEDULER__ENABLED",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "SCHEDULER__SYSTEMS",
+        default={},
+    ),
+    # PREPROCESS
+    Validator(
+        "PREPROCESS__PARALLEL",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "PREPROCESS__WORKERS",
+        default=0,
+        cast=int,
+    ),
+    Validator(
+        "PREPROCESS__PARALLEL_MIN_MB",
+        default=12.0,
+        cast=float,
+    ),
+    Validator(
+        "PREPROCESS__HOT_RELOAD",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "PREPROCESS__HOT_RELOAD_INTERVAL",
+        default=1.0,
+        cast=float,
+    ),
+    # ASSETS
+    Validator(
+        "ASSETS__BUDGET",
+        default=256,
+        cast=int,
+    ),
+    Validator(
+        "ASSETS__PRELOAD",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "ASSETS__COMPACT",
+        default="",
+        cast=str,
+        is_in=["", "palette", "delta"],
+    ),
+    # CACHE
+    Validator(
+        "CACHE__ENABLED",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "CACHE__MAX_AGE",
+        default=30,
+        cast=float,
+    ),
+    # WATCHDOG
+    Validator(
+        "WATCHDOG__ENABLED",
+        default=True,
+        cast=bool,
+    ),
+    Validator(
+        "WATCHDOG__BUDGET",
+        default=0.2,
+        cast=float,
+    ),
+    Validator(
+        "WATCHDOG__LOG_FILE",
+        default="logs/stalls.log",
+        cast=str,
+    ),
+    # SLIDESHOW
+    Validator(
+        "SLIDESHOW__PREFETCH",
+        default=2,
+        cast=int,
+    ),
+    # JOBS
+    Validator(
+        "JOBS__BUDGET",
+        default=0.8,
+        cast=float,
+    ),
+    Validator(
+        "JOBS__MAX_DEFER",
+        default=0.5,
+        cast=float,
+    ),
     # PATHS
     Validator(
         "PATHS__IMAGES_ICONS",
@@ -85,6 +225,7 @@ VALIDATORS = [
         cast=Path,
     ),
     Validator("PATHS__IMAGES_SCREENSHOTS", default="images/screenshots", cast=Path),
+    Validator("PATHS__CACHE", default="cache", cast=Path),
     # LED DISPLAY MATRIX
     Validator(
         "DISPLAY__MATRIX__ENABLED",
@@ -2,6 +2,7 @@ from enum import Enum, auto
 
 FPS_MAX = 100
 FPS_CORR = 24 / FPS_MAX
+TIME_DELTA_MAX = 0.25  # secs, clamp after stalls so animations don't jump
 
 
 class EventTypes(Enum):
@@ -10,3 +11,6 @@ class EventTypes(Enum):
     EVENT_CLOCK_NEW_MINUTE = auto()
     EVENT_CLOCK_NEW_HOUR = auto()
     EVENT_HASS_ENTITY_UPDATE = auto()
+    EVENT_MQTT_CONNECT = auto()
+    EVENT_MQTT_DISCONNECT = auto()
+    EVENT_MQTT_MESSAGE = auto()
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import time
+import pygame
+from pathlib import Path
+from pygame import Surface
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DISK_CACHE_VERSION = 2  # bump when the way cached assets are rendered changes
+DISK_CACHE_FORMAT: Final = "RGBA"
+DISK_CACHE_CHUNK = 1024 * 1024
+
+
+class DiskCache:
+    """Content addressed on-disk cache of preprocessed frame sets.
+
+    Entries are keyed on the hashes of their source files plus the transform
+    parameters, so editing an asset or changing a parameter (or the canvas
+    size) simply misses and re-renders. Frames are stored as raw RGBA pixels in
+    a `<key>.rgba` file, which is memory mapped on load, with a `<key>.json`
+    sidecar holding the frame sizes. The sidecar is written last, so an entry
+    interrupted mid-write is never read.
+    """
+
+    def __init__(self, directory: Path, max_age: float = 30) -> None:
+        self.directory = Path(directory)
+        self.max_age = max_age  # days an unused entry is kept for
+        self.hits = 0
+        self.misses = 0
+        self.digests: Dict[Tuple[str, int, int], str] = dict()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def file_digest(self, path: str) -> str:
+        # Memoized on mtime and size, so each source is only read once per boot
+        stat = os.stat(path)
+        memo_key = (str(path), stat.st_mtime_ns, stat.st_size)
+        digest = self.digests.get(memo_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(DISK_CACHE_CHUNK):
+                    hasher.update(chunk)
+            digest = self.digests[memo_key] = hasher.hexdigest()
+        return digest
+
+    def key(self, kind: str, sources: Tuple[str, ...], **params: Any) -> str:
+        identity = dict(
+            version=DISK_CACHE_VERSION,
+            kind=kind,
+            sources=[self.file_digest(source) for source in sources],
+            params=params,
+        )
+        blob = json.dumps(identity, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def load(self, key: str) -> Optional[List[Surface]]:
+        meta_path, data_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            surfaces = self._read_frames(data_path, meta["frames"])
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"disk_cache.load: key={key} error={e}")
+            self.misses += 1
+            return None
+        os.utime(meta_path)  # mark as used for prune()
+        self.hits += 1
+        return surfaces
+
+    def store(self, key: str, surfaces: List[Surface]) -> None:
+        meta_path, data_path = self._paths(key)
+        try:
+            tmp_path = data_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for surface in surfaces:
+                    f.write(pygame.image.tobytes(surface, DISK_CACHE_FORMAT))
+            os.replace(tmp_path, data_path)
+            meta = dict(frames=[list(surface.get_size()) for surface in surfaces])
+            tmp_path = meta_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            logger.warning(f"disk_cache.store: key={key} error={e}")
+
+    def prune(self) -> int:
+        # Superseded entries are never hit again, drop them once they go stale
+        cutoff = time.time() - self.max_age * 86400
+        removed = 0
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                if meta_path.stat().st_mtime < cutoff:
+                    meta_path.unlink()
+                    meta_path.with_suffix(".rgba").unlink(missing_ok=True)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"disk_cache.prune: path={meta_path} error={e}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return dict(hits=self.hits, misses=self.misses)
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return (self.directory / f"{key}.json", self.directory / f"{key}.rgba")
+
+    def _read_frames(self, data_path: Path, frames: List[List[int]]) -> List[Surface]:
+        expected = sum(w * h * 4 for w, h in frames)
+        with open(data_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != expected:
+                raise ValueError(f"expected {expected} bytes")
+            if expected == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                surfaces = []
+                offset = 0
+                for w, h in frames:
+                    size = w * h * 4
+                    # frombuffer() wraps the mapped pixels, convert_alpha() copies
+                    # them into the display format so the map can be closed
+                    surface = pygame.image.frombuffer(
+                        view[offset : offset + size], (w, h), DISK_CACHE_FORMAT
+                    ).convert_alpha()
+                    surfaces.append(surface)
+                    offset += size
+                view.release()
+        return surfaces
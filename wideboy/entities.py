@@ -3,16 +3,23 @@ from dataclasses import field
 from dynaconf import Dynaconf
 from ecs_pattern import entity
 from paho.mqtt.client import Client as MQTTClient
-from typing import Callable
+from pygame import Rect
+from typing import Callable, List, Optional
 from .components import (
     ComAlpha,
     ComBound,
     ComFade,
     ComFrame,
+    ComMode7,
     ComMotion,
     ComTarget,
     ComVisible,
 )
+from .assets import AssetManager
+from .backgrounds import BackgroundLibrary
+from .events import EventBatch, EventQueue
+from .jobs import JobScheduler
+from .profiler import FrameProfiler
 
 
 @entity
@@ -20,8 +27,19 @@ class AppState:
     booting: bool
     running: bool
     config: Dynaconf = None
-    events: list = field(default_factory=list)
+    events: EventBatch = ()
+    event_queue: EventQueue = field(default_factory=EventQueue)
+    assets: AssetManager = field(default_factory=AssetManager)
+    jobs: JobScheduler = field(default_factory=JobScheduler)
+    backgrounds: Optional[BackgroundLibrary] = None
+    profiler: FrameProfiler = field(default_factory=FrameProfiler)
     time_now: datetime.datetime = datetime.datetime.now()
+    time_delta: float = 0.0
+    frame_start: float = 0.0  # time.monotonic() when SysEvents started the frame
+    idle: bool = False
+    damage: List[Rect] = field(default_factory=list)  # canvas redrawn this frame
+    canvas_serial: int = 0  # bumped by SysDraw whenever the canvas changes
+    preloading: bool = False  # assets still loading in the background after boot
     hass_state: dict = field(default_factory=dict)
     master_power: bool = True
     master_brightness: int = 128
@@ -29,7 +47,6 @@ class AppState:
     tint_brightness: int = 128
     tint_color: tuple = (255, 0, 64)
     slideshow_interval: int = 10
-    slideshow_index: int = 0
     clock_24_hour: bool = True
     screenshot: bool = False
     text_message: str = ""
@@ -45,11 +62,6 @@ class MQTTService:
     on_message_listeners: list = field(default_factory=list)
 
 
-@entity
-class Cache:
-    surfaces: dict = field(default_factory=dict)
-
-
 @entity
 class WidgetText(ComFade, ComTarget, ComMotion, ComAlpha, ComVisible):
     pass
@@ -110,12 +122,12 @@ class WidgetDucky(
 
 
 @entity
-class WidgetVinyl(ComFrame, ComFade, ComMotion, ComAlpha, ComVisible):
+class WidgetVinyl(ComMode7, ComFade, ComMotion, ComAlpha, ComVisible):
     pass
 
 
 @entity
-class WidgetGalaxy(ComFrame, ComFade, ComMotion, ComAlpha, ComVisible):
+class WidgetGalaxy(ComMode7, ComFade, ComMotion, ComAlpha, ComVisible):
     pass
 
 
@@ -0,0 +1,114 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[Any, Dict[str, Any]]
+EventBatch = Tuple[Event, ...]
+
+EVENT_QUEUE_SIZE = 4096
+
+
+class LatestSlot:
+    # A push_latest() key's place in the queue, holding its newest event
+    __slots__ = ("key", "event")
+
+    def __init__(self, key: Hashable, event: Event) -> None:
+        self.key = key
+        self.event = event
+
+
+class EventQueue:
+    """Bounded multi-producer, single-consumer event queue.
+
+    Producers (pygame, clock, MQTT network thread) call push() from any thread.
+    The ECS loop calls drain() exactly once per frame to get an immutable batch.
+    No lock is taken: deque.append() and deque.popleft() are atomic, so the
+    bound is soft by at most one event per concurrent producer.
+
+    State updates are pushed with push_latest() instead, keyed by what they
+    update. They are never dropped, as a lost update is never resent, and a
+    newer update replaces one with the same key that hasn't been drained yet,
+    so they are bounded by the amount of state rather than the traffic. The
+    first update for a key queues a slot, so it's drained in arrival order.
+    """
+
+    def __init__(self, maxsize: int = EVENT_QUEUE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._queue: Deque[Union[Event, LatestSlot]] = deque()
+        self._full = False
+        self._ready = threading.Event()
+        self._latest: Dict[Hashable, LatestSlot] = dict()  # slots not drained
+        self._latest_lock = threading.Lock()
+        self.pushed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.overflows = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def push(self, event_type: Any, payload: Optional[Dict[str, Any]] = None) -> bool:
+        # Slots don't count towards the bound, they're never dropped
+        if len(self._queue) - len(self._latest) >= self.maxsize:
+            self.dropped += 1
+            if not self._full:
+                self._full = True
+                self.overflows += 1
+            return False
+        self._queue.append((event_type, payload if payload is not None else dict()))
+        self.pushed += 1
+        self._ready.set()
+        return True
+
+    def push_latest(
+        self, key: Hashable, event_type: Any, payload: Optional[Dict[str, Any]] = None
+    ) -> None:
+        event = (event_type, payload if payload is not None else dict())
+        with self._latest_lock:
+            slot = self._latest.get(key)
+            if slot is not None:
+                slot.event = event
+                self.coalesced += 1
+            else:
+                slot = self._latest[key] = LatestSlot(key, event)
+                self._queue.append(slot)
+                self.pushed += 1
+        self._ready.set()
+
+    def wait(self, timeout: float) -> bool:
+        # Block until something is pushed (or already queued), used when idling
+        return self._ready.wait(timeout)
+
+    def drain(self) -> EventBatch:
+        # Only take what is queued now, late producers land in the next batch
+        self._ready.clear()
+        popleft = self._queue.popleft
+        # Slots are taken under the lock, so a late update to one either
+        # makes this batch or starts a new slot for the next
+        with self._latest_lock:
+            batch = tuple(self._take(popleft()) for _ in range(len(self._queue)))
+        if self._full:
+            logger.warning(
+                f"events.queue.overflow: dropped={self.dropped} overflows={self.overflows} maxsize={self.maxsize}"
+            )
+            self._full = False
+        return batch
+
+    def _take(self, item: Union[Event, LatestSlot]) -> Event:
+        # Caller holds the lock
+        if isinstance(item, LatestSlot):
+            del self._latest[item.key]
+            return item.event
+        return item
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            queued=len(self),
+            pushed=self.pushed,
+            coalesced=self.coalesced,
+            dropped=self.dropped,
+            overflows=self.overflows,
+        )
@@ -0,0 +1,63 @@
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Stat = Optional[Tuple[int, int]]  # (mtime_ns, size), None if missing
+
+
+def source_stat(path: str) -> Stat:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class SourceWatcher:
+    """Polls asset source files for changes.
+
+    Each path maps to the asset keys built from it. A change is only reported
+    once the file has stopped changing for one poll, so an editor still
+    writing it out isn't picked up half saved. Deleted files are ignored,
+    the loaded asset is kept until the file is back.
+    """
+
+    paths: Dict[str, Set[str]]
+    stats: Dict[str, Stat]
+    pending: Dict[str, Stat]
+
+    def __init__(self) -> None:
+        self.paths = defaultdict(set)
+        self.stats = dict()
+        self.pending = dict()
+
+    def watch(self, path: str, keys: Iterable[str]) -> None:
+        path = str(path)
+        self.paths[path].update(keys)
+        if path not in self.stats:
+            self.stats[path] = source_stat(path)
+
+    def poll(self) -> Set[str]:
+        # Keys with a source that changed and has settled since the last poll
+        changed: Set[str] = set()
+        for path, keys in self.paths.items():
+            stat = source_stat(path)
+            if stat == self.stats[path]:
+                self.pending.pop(path, None)
+                continue
+            if stat is None:
+                if path not in self.pending:
+                    logger.warning(f"hot_reload.poll: missing path={path}")
+                self.pending[path] = stat
+                continue
+            if path in self.pending and self.pending[path] == stat:
+                del self.pending[path]
+                self.stats[path] = stat
+                logger.info(f"hot_reload.poll: changed path={path} keys={keys}")
+                changed.update(keys)
+            else:
+                self.pending[path] = stat
+        return changed
@@ -0,0 +1,155 @@
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_PRIORITY_HIGH = 0  # visible state, e.g. a changed tile
+JOB_PRIORITY_NORMAL = 1
+JOB_PRIORITY_LOW = 2  # background work nothing is waiting on, e.g. preloading
+
+JOB_MAX_DEFER = 0.5  # secs without a step before one is forced through
+
+
+@dataclass(order=True)
+class Job:
+    priority: int
+    seq: int  # FIFO within a priority
+    name: str = field(compare=False)
+    steps: Iterator[Any] = field(compare=False, repr=False)
+    key: Optional[str] = field(default=None, compare=False)
+    submitted: float = field(default=0.0, compare=False)
+    run_time: float = field(default=0.0, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+    done: bool = field(default=False, compare=False)
+
+
+class JobScheduler:
+    """Cooperative jobs, run in whatever is left of each frame's budget.
+
+    A job is a generator that does a slice of work between each yield. Once
+    the frame's systems have run, run() steps the highest priority job until
+    the deadline passes, so expensive one-off work is spread over frames
+    instead of dropping them. A step is never interrupted, so keep them short.
+
+    Jobs submitted with a key replace any queued job with the same key, for
+    work where only the latest request matters.
+    """
+
+    queue: List[Job]
+    keyed: Dict[str, Job]
+
+    def __init__(self, max_defer: float = JOB_MAX_DEFER) -> None:
+        self.max_defer = max_defer
+        self.queue = []
+        self.keyed = dict()
+        self.seq = 0
+        self.depth = 0  # queued jobs, not counting cancelled ones
+        self.last_step = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.steps = 0
+        self.forced = 0
+        self.deferred_frames = 0
+        self.deferred_total = 0.0
+        self.deferred_max = 0.0
+
+    def __len__(self) -> int:
+        return self.depth
+
+    def submit(
+        self,
+        steps: Iterator[Any],
+        name: str,
+        priority: int = JOB_PRIORITY_NORMAL,
+        key: Optional[str] = None,
+    ) -> Job:
+        if key is not None:
+            self.cancel(key)
+        self.seq += 1
+        job = Job(priority, self.seq, name, steps, key, submitted=time.monotonic())
+        if not self.depth:
+            # Nothing was waiting, don't count the idle time as deferral
+            self.last_step = job.submitted
+        heapq.heappush(self.queue, job)
+        self.depth += 1
+        if key is not None:
+            self.keyed[key] = job
+        return job
+
+    def cancel(self, key: str) -> None:
+        job = self.keyed.pop(key, None)
+        if job is not None:
+            # Left in the heap, skipped when it reaches the top
+            job.cancelled = True
+            self.depth -= 1
+            close = getattr(job.steps, "close", None)
+            if close is not None:
+                close()
+
+    def run(self, deadline: float) -> int:
+        # Steps run this frame, deadline is on the time.monotonic() clock
+        steps = 0
+        queue = self.queue
+        while queue:
+            job = queue[0]
+            if job.cancelled:
+                heapq.heappop(queue)
+                continue
+            now = time.monotonic()
+            if now >= deadline:
+                # Out of budget, unless jobs have been starved for too long
+                if steps or now - self.last_step < self.max_defer:
+                    self.deferred_frames += 1
+                    break
+                self.forced += 1
+            self._step(job, now)
+            steps += 1
+            if job.done:
+                heapq.heappop(queue)
+        return steps
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            depth=self.depth,
+            completed=self.completed,
+            failed=self.failed,
+            steps=self.steps,
+            forced=self.forced,
+            deferred_frames=self.deferred_frames,
+            deferred_avg=round(
+                self.deferred_total / self.completed if self.completed else 0.0, 3
+            ),
+            deferred_max=round(self.deferred_max, 3),
+        )
+
+    def _step(self, job: Job, start: float) -> None:
+        try:
+            next(job.steps)
+        except StopIteration:
+            job.done = True
+        except Exception:
+            logger.exception(f"jobs.step: job={job.name} failed")
+            job.done = True
+            self.failed += 1
+        end = time.monotonic()
+        self.last_step = end
+        self.steps += 1
+        job.run_time += end - start
+        if job.done:
+            self._complete(job, end)
+
+    def _complete(self, job: Job, end: float) -> None:
+        if job.key is not None and self.keyed.get(job.key) is job:
+            del self.keyed[job.key]
+        self.depth -= 1
+        # Time spent queued rather than running
+        deferred = end - job.submitted - job.run_time
+        self.completed += 1
+        self.deferred_total += deferred
+        self.deferred_max = max(self.deferred_max, deferred)
+        logger.debug(
+            f"jobs.complete: job={job.name} run={job.run_time * 1000:.1f}ms deferred={deferred * 1000:.1f}ms"
+        )
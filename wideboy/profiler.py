@@ -0,0 +1,178 @@
+import logging
+from array import array
+from ecs_pattern import System, SystemManager
+from time import perf_counter_ns
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_WINDOW = 1000  # samples kept per timer (10s at FPS_MAX)
+
+
+class RollingHistogram:
+    """Fixed size ring buffer of nanosecond samples.
+
+    Recording is a single array store, percentiles are only computed (by
+    sorting a copy) when a summary is requested.
+    """
+
+    def __init__(self, size: int = PROFILE_WINDOW) -> None:
+        self.samples = array("q", bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+        self.max_ns = 0
+
+    def add(self, value_ns: int) -> None:
+        self.samples[self.index] = value_ns
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentiles(self, *ps: float) -> List[int]:
+        ordered = sorted(self.samples[: self.count])
+        if not ordered:
+            return [0 for _ in ps]
+        return [ordered[min(int(p / 100 * self.count), self.count - 1)] for p in ps]
+
+    def summary(self, scale: float = 1e6) -> Dict[str, float]:
+        # In ms by default, scale=1 for samples that aren't times
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        window_max = max(self.samples[: self.count], default=0)
+        return dict(
+            n=self.count,
+            p50=p50 / scale,
+            p95=p95 / scale,
+            p99=p99 / scale,
+            max=window_max / scale,
+            max_all=self.max_ns / scale,
+        )
+
+
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self) -> None:
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *args) -> None:
+        self.profiler.record(self.name, perf_counter_ns() - self.start)
+
+
+class _NullTimer:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class FrameProfiler:
+    enabled: bool
+    histograms: Dict[str, RollingHistogram]
+
+    def __init__(self, enabled: bool = False, window: int = PROFILE_WINDOW) -> None:
+        self.enabled = enabled
+        self.window = window
+        self.histograms = dict()
+        self.timers: Dict[str, _Timer] = dict()
+        self.counts: Dict[str, RollingHistogram] = dict()  # per frame, not timed
+
+    def record(self, name: str, elapsed_ns: int) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.window)
+        histogram.add(elapsed_ns)
+
+    def timer(self, name: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = _Timer(self, name)
+        return timer
+
+    def count(self, name: str, value: int) -> None:
+        # A per frame count, e.g. sprites drawn, summarised like the timers
+        if not self.enabled:
+            return
+        histogram = self.counts.get(name)
+        if histogram is None:
+            histogram = self.counts[name] = RollingHistogram(self.window)
+        histogram.add(value)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: h.summary() for name, h in self.histograms.items()}
+
+    def count_summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: h.summary(scale=1) for name, h in self.counts.items()}
+
+    def log_summary(self) -> None:
+        if not self.enabled:
+            logger.info("profiler.summary: disabled (set general.profile = true)")
+            return
+        for name, stats in sorted(
+            self.summary().items(), key=lambda item: item[1]["p95"], reverse=True
+        ):
+            logger.info(
+                f"profiler.summary: {name:<20} n={stats['n']} p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms p99={stats['p99']:.2f}ms max={stats['max']:.2f}ms"
+            )
+        for name, stats in sorted(self.count_summary().items()):
+            logger.info(
+                f"profiler.counts: {name:<20} n={stats['n']} p50={stats['p50']:.0f} p95={stats['p95']:.0f} max={stats['max_all']:.0f}"
+            )
+
+
+class ProfiledSystemManager(SystemManager):
+    """SystemManager that times each system's update() when profiling is enabled"""
+
+    profiler: FrameProfiler
+    current: Optional[System]
+
+    def __init__(
+        self, system_list: Iterable[System], profiler: Optional[FrameProfiler] = None
+    ) -> None:
+        super().__init__(system_list)
+        self.profiler = profiler or FrameProfiler()
+        self.current = None
+        self._names = {
+            system: system.__class__.__name__
+            for system in self._system_with_update_list
+        }
+
+    def due_systems(self) -> Iterable[System]:
+        # Subclasses can skip systems that have nothing to do this frame
+        systems: Iterable[System] = self._system_with_update_list
+        return systems
+
+    def update_systems(self) -> None:
+        # `current` is tracked even when not profiling, the watchdog reports it
+        if not self.profiler.enabled:
+            for system in self.due_systems():
+                self.current = system
+                system.update()
+            self.current = None
+            return
+        record = self.profiler.record
+        frame_start = perf_counter_ns()
+        for system in self.due_systems():
+            self.current = system
+            start = perf_counter_ns()
+            system.update()
+            record(self._names[system], perf_counter_ns() - start)
+        self.current = None
+        record("systems", perf_counter_ns() - frame_start)
+
+    def current_name(self) -> Optional[str]:
+        current = self.current
+        return self._names.get(current) if current is not None else None
@@ -0,0 +1,90 @@
+import bisect
+import logging
+from ecs_pattern import EntityManager, entity
+from typing import Any, Dict, Iterator, List, Tuple
+from .components import ComVisible
+
+logger = logging.getLogger(__name__)
+
+RenderKey = Tuple[int, int]  # (z_order, seq), ties are drawn in the order added
+
+
+class RenderList:
+    """Visible entities, kept in draw order as they are added and removed.
+
+    Entities are placed by z-order when added, so nothing is sorted per frame.
+    A changed z_order is picked up by refresh(), which only sorts again if
+    one actually changed.
+    """
+
+    entities: List[entity]
+    keys: List[RenderKey]  # parallel to entities, sorted
+    placed: Dict[int, RenderKey]  # id(entity) -> key
+
+    def __init__(self) -> None:
+        self.entities = []
+        self.keys = []
+        self.placed = dict()
+        self.seq = 0
+        self.sorts = 0
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __iter__(self) -> Iterator[entity]:
+        return iter(self.entities)
+
+    def add(self, e: entity) -> None:
+        if id(e) in self.placed:
+            return
+        self.seq += 1
+        key = (e.z_order, self.seq)
+        index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        self.entities.insert(index, e)
+        self.placed[id(e)] = key
+
+    def remove(self, e: entity) -> None:
+        key = self.placed.pop(id(e), None)
+        if key is None:
+            return
+        index = bisect.bisect_left(self.keys, key)
+        del self.keys[index]
+        del self.entities[index]
+
+    def refresh(self) -> bool:
+        # Sorts again if any z_order changed since the entities were placed
+        for e, key in zip(self.entities, self.keys):
+            if e.z_order != key[0]:
+                break
+        else:
+            return False
+        order = sorted(
+            ((e.z_order, key[1]), e) for e, key in zip(self.entities, self.keys)
+        )
+        self.keys = [key for key, _ in order]
+        self.entities = [e for _, e in order]
+        self.placed = {id(e): key for key, e in order}
+        self.sorts += 1
+        logger.debug(f"render_list.sort: entities={len(self.entities)}")
+        return True
+
+
+class RenderEntityManager(EntityManager):
+    """EntityManager that keeps a RenderList of the ComVisible entities"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.render_list = RenderList()
+
+    def add(self, *entity_value_list: Any) -> None:
+        super().add(*entity_value_list)
+        for entity_value in entity_value_list:
+            if isinstance(entity_value, ComVisible):
+                self.render_list.add(entity_value)
+
+    def delete(self, *entity_value_list: Any) -> None:
+        for entity_value in entity_value_list:
+            super().delete(entity_value)
+            if isinstance(entity_value, ComVisible):
+                self.render_list.remove(entity_value)
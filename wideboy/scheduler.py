@@ -0,0 +1,145 @@
+import logging
+import time
+from dataclasses import dataclass
+from ecs_pattern import System
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .events import Event
+from .profiler import FrameProfiler, ProfiledSystemManager
+
+logger = logging.getLogger(__name__)
+
+RATE_FRAME = "frame"  # every frame
+RATE_EVENTS = "events"  # only on frames whose event batch has a matching event
+
+
+@dataclass
+class Schedule:
+    rate: Union[str, float] = RATE_FRAME  # "frame", "events" or Hz
+    phase: float = 0.0  # offset as a fraction of the period (Hz rates only)
+    event_types: Tuple[Any, ...] = ()
+    pinned: bool = False  # config can't override it, the frame depends on it
+
+    @classmethod
+    def from_config(cls, config: Any, default: "Schedule") -> "Schedule":
+        if not config:
+            return default
+        rate = config.get("rate", default.rate)
+        if rate not in (RATE_FRAME, RATE_EVENTS):
+            rate = float(rate)
+            if rate <= 0:
+                raise ValueError(f"Schedule rate must be positive, got {rate}")
+        return cls(
+            rate=rate,
+            phase=float(config.get("phase", default.phase)) % 1.0,
+            event_types=default.event_types,
+        )
+
+
+def schedule_name(system: System) -> str:
+    # SysHomeAssistant -> "homeassistant", SysMQTT -> "mqtt"
+    name: str = system.__class__.__name__
+    return (name[3:] if name.startswith("Sys") else name).lower()
+
+
+class ScheduledSystemManager(ProfiledSystemManager):
+    """Runs each system at its own rate instead of every frame.
+
+    Systems declare a default `schedule` class attribute, which can be
+    overridden per system in config under `scheduler.systems.<name>`, unless
+    it's pinned, like SysEvents starting the frame.
+
+    Systems run at a rate in Hz still see every event: the batches of the
+    frames they skip are kept and handed to them, in order, when they run.
+    """
+
+    schedules: Dict[System, Schedule]
+    next_due: Dict[System, float]
+    pending: Dict[System, List[Event]]  # events from frames a system skipped
+
+    def __init__(
+        self,
+        system_list: Iterable[System],
+        app_state: Any,
+        profiler: Optional[FrameProfiler] = None,
+    ) -> None:
+        super().__init__(system_list, profiler)
+        self.app_state = app_state
+        config = app_state.config.scheduler
+        self.enabled = config.enabled
+        self.schedules = dict()
+        self.next_due = dict()
+        self.pending = dict()
+        for system in self._system_with_update_list:
+            default = getattr(system, "schedule", None) or Schedule()
+            name = schedule_name(system)
+            overrides = config.systems.get(name)
+            if default.pinned:
+                if overrides:
+                    logger.warning(
+                        f"scheduler.schedule: system={name} must run every frame, ignoring config"
+                    )
+                overrides = None
+            schedule = Schedule.from_config(overrides, default)
+            if schedule.rate == RATE_EVENTS and not schedule.event_types:
+                logger.warning(
+                    f"scheduler.schedule: system={name} declares no event types, running every frame"
+                )
+                schedule = Schedule()
+            if schedule.rate != RATE_FRAME:
+                logger.debug(f"scheduler.schedule: system={name} schedule={schedule}")
+            self.schedules[system] = schedule
+
+    def start_systems(self) -> None:
+        super().start_systems()
+        now = time.monotonic()
+        for system, schedule in self.schedules.items():
+            if isinstance(schedule.rate, float):
+                self.next_due[system] = now + schedule.phase / schedule.rate
+
+    def due_systems(self) -> Iterator[System]:
+        if not self.enabled:
+            yield from self._system_with_update_list
+            return
+        # Checked lazily, so event driven systems see the batch SysEvents drained
+        # earlier in this same frame
+        for system in self._system_with_update_list:
+            schedule = self.schedules[system]
+            if schedule.rate == RATE_FRAME:
+                yield system
+            elif schedule.rate == RATE_EVENTS:
+                if self._has_events(schedule):
+                    yield system
+            elif self._is_due(system, schedule):
+                yield from self._catch_up(system)
+            elif self.app_state.events:
+                self.pending.setdefault(system, []).extend(self.app_state.events)
+
+    def _catch_up(self, system: System) -> Iterator[System]:
+        # Runs the system with the events of the frames it skipped, then this one's
+        pending = self.pending.pop(system, None)
+        if not pending:
+            yield system
+            return
+        events = self.app_state.events
+        self.app_state.events = tuple(pending) + events
+        try:
+            yield system
+        finally:
+            self.app_state.events = events
+
+    def _has_events(self, schedule: Schedule) -> bool:
+        event_types = schedule.event_types
+        return any(event_type in event_types for event_type, _ in self.app_state.events)
+
+    def _is_due(self, system: System, schedule: Schedule) -> bool:
+        now = time.monotonic()
+        next_due = self.next_due[system]
+        if now < next_due:
+            return False
+        period = 1.0 / float(schedule.rate)
+        # Keep the phase, but don't try to catch up on missed runs
+        next_due += period
+        if next_due <= now:
+            next_due += period * ((now - next_due) // period + 1)
+        self.next_due[system] = next_due
+        return True
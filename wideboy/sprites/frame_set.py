@@ -0,0 +1,179 @@
+import logging
+import zlib
+import numpy as np
+import pygame
+from PIL import Image
+from pygame import Surface, SRCALPHA
+from typing import List, Sequence
+
+logger = logging.getLogger(__name__)
+
+FRAMES_PALETTE = "palette"  # one 8-bit index per pixel into a shared palette
+FRAMES_DELTA = "delta"  # zlib compressed XOR against the previous frame
+FRAMES_MODES = (FRAMES_PALETTE, FRAMES_DELTA)
+
+DELTA_KEYFRAME_INTERVAL = 16  # bounds the frames decoded for a random seek
+PALETTE_COLORS = 256
+
+
+class CompactFrames(Sequence[Surface]):
+    """One animation's view of a CompactFrameSet.
+
+    Indexing decodes the frame into a surface owned by the view and returns
+    it, so the previous frame's pixels are overwritten. Each animation showing
+    the set takes its own view with instance(), so they can be on different
+    frames.
+    """
+
+    def __init__(self, frame_set: "CompactFrameSet") -> None:
+        self.frame_set = frame_set
+        self.surface = Surface(frame_set.size, SRCALPHA).convert_alpha()
+        self.decoded = -1  # frame currently in self.surface
+
+    def __len__(self) -> int:
+        return self.frame_set.frame_count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            raise TypeError("Frame sets decode one frame at a time")
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("frame index out of range")
+        if index != self.decoded:
+            self.frame_set.decode(self.surface, index, self.decoded)
+            self.decoded = index
+        return self.surface
+
+
+class CompactFrameSet(Sequence[Surface]):
+    """Equally sized animation frames, stored compactly.
+
+    The set is shared, frames are decoded by views of it: instance() returns
+    a new one for each animation. Indexing the set itself goes through a view
+    of its own, for one-off reads like a sprite's first frame.
+
+    Palette mode is lossless if the frames use at most 256 colours, otherwise
+    they are quantized. Delta mode is lossless, and suits frames that change
+    little from one to the next.
+    """
+
+    def __init__(self, surfaces: Sequence[Surface], mode: str = FRAMES_PALETTE) -> None:
+        if mode not in FRAMES_MODES:
+            raise ValueError(f"Unknown frame set mode: {mode}")
+        if not surfaces:
+            raise ValueError("Frame set needs at least one frame")
+        self.mode = mode
+        self.size = surfaces[0].get_size()
+        self.frame_count = len(surfaces)
+        self.frames = CompactFrames(self)
+        self.raw_bytes = sum(s.get_pitch() * s.get_height() for s in surfaces)
+        # Frames as mapped pixels in the surface's own format, shape (w, h)
+        pixels = [self._pixels(surface) for surface in surfaces]
+        if mode == FRAMES_PALETTE:
+            self._encode_palette(pixels)
+        else:
+            self._encode_delta(pixels)
+        logger.debug(
+            f"frame_set.encode: mode={mode} frames={self.frame_count} raw={self.raw_bytes / 1e6:.1f}MB stored={self.stored_bytes / 1e6:.1f}MB saved={self.saved_ratio:.0%}"
+        )
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        return self.frames[index]
+
+    def instance(self) -> CompactFrames:
+        return CompactFrames(self)
+
+    @property
+    def stored_bytes(self) -> int:
+        if self.mode == FRAMES_PALETTE:
+            return int(self.indices.nbytes + self.palette.nbytes)
+        return sum(len(delta) for delta in self.deltas)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.raw_bytes - self.stored_bytes
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.saved_bytes / self.raw_bytes if self.raw_bytes else 0.0
+
+    def _pixels(self, surface: Surface) -> np.ndarray:
+        if surface.get_size() != self.size:
+            raise ValueError("Frame set frames must all be the same size")
+        converted = surface.convert_alpha()
+        return pygame.surfarray.array2d(converted).astype(np.uint32)
+
+    def _encode_palette(self, pixels: List[np.ndarray]) -> None:
+        stacked = np.stack(pixels)
+        colors, inverse = np.unique(stacked, return_inverse=True)
+        if len(colors) > PALETTE_COLORS:
+            colors, inverse = self._quantize(stacked)
+        self.palette = colors.astype(np.uint32)
+        self.indices = inverse.reshape(stacked.shape).astype(np.uint8)
+
+    def _quantize(self, stacked: np.ndarray):
+        # Quantize every frame against one palette, as a single tall image
+        frames, w, h = stacked.shape
+        surface = self.frames.surface
+        mosaic = Surface((w, h * frames), SRCALPHA, surface)
+        view = pygame.surfarray.pixels2d(mosaic)
+        view[:, :] = stacked.transpose(1, 0, 2).reshape(w, frames * h)
+        del view
+        image = Image.frombytes(
+            "RGBA", mosaic.get_size(), pygame.image.tobytes(mosaic, "RGBA")
+        ).quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        rgba = np.array(image.getpalette("RGBA"), dtype=np.uint32).reshape(-1, 4)
+        colors = np.array([surface.map_rgb(tuple(color)) for color in rgba])
+        # Quantized image is (frames * h, w), back to (frames, w, h)
+        inverse = np.asarray(image).reshape(frames, h, w).transpose(0, 2, 1)
+        logger.info(
+            f"frame_set.quantize: frames={frames} size={w}x{h} colors={len(colors)}"
+        )
+        return colors, inverse
+
+    def _encode_delta(self, pixels: List[np.ndarray]) -> None:
+        self.deltas: List[bytes] = []
+        previous = None
+        for index, frame in enumerate(pixels):
+            if previous is None or index % DELTA_KEYFRAME_INTERVAL == 0:
+                delta = frame
+            else:
+                delta = frame ^ previous
+            self.deltas.append(zlib.compress(delta.tobytes(), 1))
+            previous = frame
+
+    def decode(self, surface: Surface, index: int, decoded: int = -1) -> None:
+        # Into surface, which holds frame decoded already (-1 for none)
+        view = pygame.surfarray.pixels2d(surface)
+        if self.mode == FRAMES_PALETTE:
+            np.take(self.palette, self.indices[index], out=view)
+        else:
+            keyframe = index - index % DELTA_KEYFRAME_INTERVAL
+            # Continue from the decoded frame when playing forwards
+            start = decoded + 1 if keyframe <= decoded < index else keyframe
+            for i in range(start, index + 1):
+                delta = np.frombuffer(zlib.decompress(self.deltas[i]), np.uint32)
+                delta = delta.reshape(view.shape)
+                if i == keyframe:
+                    view[:, :] = delta
+                else:
+                    view ^= delta
+        del view  # unlock the surface so it can be blitted
+
+
+def frames_instance(frames: Sequence[Surface]) -> Sequence[Surface]:
+    # Frames for one animation to show, plain lists can be shared as they are
+    if isinstance(frames, CompactFrameSet):
+        return frames.instance()
+    return frames
+
+
+def frames_source(frames: Sequence[Surface]) -> Sequence[Surface]:
+    # The stored frames an animation's frames came from
+    if isinstance(frames, CompactFrames):
+        return frames.frame_set
+    return frames
@@ -0,0 +1,112 @@
+import logging
+import pygame
+import queue
+import threading
+from PIL import Image, ImageSequence
+from pygame import Surface
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GIF_BUFFER_FRAMES = 4
+GIF_DEFAULT_DURATION = 0.1  # secs, as browsers use for missing or ~0 durations
+GIF_MIN_DURATION = 0.02
+
+# (size, RGBA pixels, duration in secs), or None once a cached stream has
+# decoded its only loop
+DecodedFrame = Optional[Tuple[Tuple[int, int], bytes, float]]
+
+
+def gif_frame_duration(frame: Image.Image) -> float:
+    duration = frame.info.get("duration", 0) / 1000
+    return duration if duration >= GIF_MIN_DURATION else GIF_DEFAULT_DURATION
+
+
+class GifStream:
+    """Animated GIF decoded incrementally on a worker thread.
+
+    The worker decodes ahead into a small bounded buffer, so only a few frames
+    are resident however long the GIF is. Each frame keeps its own duration
+    from the file. With `cache` the first loop's frames are kept and replayed
+    instead, for small GIFs that are cheaper to hold than to keep decoding.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = GIF_BUFFER_FRAMES,
+        cache: bool = False,
+        size: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.path = path
+        self.cache = cache
+        self.size = size
+        self.frames: List[Tuple[Surface, float]] = []
+        self.frame_index = 0
+        self.cached = False
+        self.underruns = 0
+        self._queue: "queue.Queue[DecodedFrame]" = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="wideboy-gif-stream", daemon=True
+        )
+        self._thread.start()
+
+    def next_frame(self) -> Optional[Tuple[Surface, float]]:
+        # None if the worker hasn't decoded the next frame yet
+        if self.cached:
+            frame = self.frames[self.frame_index]
+            self.frame_index = (self.frame_index + 1) % len(self.frames)
+            return frame
+        try:
+            decoded = self._queue.get_nowait()
+        except queue.Empty:
+            self.underruns += 1
+            return None
+        if decoded is None:
+            self.cached = bool(self.frames)
+            return self.next_frame() if self.cached else None
+        size, pixels, duration = decoded
+        surface = pygame.image.frombytes(pixels, size, "RGBA").convert_alpha()
+        if self.cache:
+            self.frames.append((surface, duration))
+        return surface, duration
+
+    def close(self) -> None:
+        # Not joined, it's called from the render loop and the worker can be
+        # mid-decode. It stops at its next check, and is a daemon anyway
+        self._stop.set()
+        if self.underruns:
+            logger.debug(
+                f"gif_stream.close: path={self.path} underruns={self.underruns}"
+            )
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                self._decode_loop()
+                if self.cache:
+                    self._put(None)
+                    return
+        except (OSError, ValueError) as e:
+            logger.warning(f"gif_stream.decode: path={self.path} error={e}")
+
+    def _decode_loop(self) -> None:
+        with Image.open(self.path) as image:
+            for frame in ImageSequence.Iterator(image):
+                if self._stop.is_set():
+                    return
+                duration = gif_frame_duration(frame)
+                rgba = frame.convert("RGBA")
+                if self.size is not None and rgba.size != self.size:
+                    rgba = rgba.resize(self.size, Image.Resampling.BILINEAR)
+                self._put((rgba.size, rgba.tobytes(), duration))
+
+    def _put(self, decoded: DecodedFrame) -> None:
+        # Blocks while the buffer is full, waking up to check for close()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(decoded, timeout=0.1)
+                return
+            except queue.Full:
+                pass
@@ -1,6 +1,6 @@
 import logging
 import pygame
-from PIL import Image, ImageFilter, ImageEnhance
+from PIL import Image, ImageFilter, ImageEnhance, ImageSequence
 from pygame import Color, Surface, Vector2, BLEND_RGBA_MULT, SRCALPHA
 from typing import Optional, Tuple
 
@@ -18,19 +18,13 @@ def load_image(filename: str, convert_alpha: bool = True) -> Surface:
 def load_gif(
     filename: str, convert_alpha: bool = True, size: Optional[Tuple[int, int]] = None
 ) -> list[Surface]:
-    gif_image = Image.open(filename)
     surfaces = []
-    try:
-        while True:
-            gif_image.seek(gif_image.tell() + 1)
-            gif_frame = gif_image.copy()
-            if gif_frame:
-                surface = pil_to_surface(gif_frame, convert_alpha)
-                if size is not None:
-                    surface = pygame.transform.smoothscale(surface, size)
-                surfaces.append(surface)
-    except EOFError:
-        pass
+    with Image.open(filename) as gif_image:
+        for gif_frame in ImageSequence.Iterator(gif_image):
+            surface = pil_to_surface(gif_frame, convert_alpha)
+            if size is not None:
+                surface = pygame.transform.smoothscale(surface, size)
+            surfaces.append(surface)
     return surfaces
 
 
@@ -1,36 +1,68 @@
 import logging
+import math
+import numpy as np
+import pygame
 from pygame import Rect, Surface, SRCALPHA
 from pygame.sprite import Sprite
-from pygame.transform import rotozoom, smoothscale
-from typing import Tuple
+from pygame.transform import smoothscale
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
 class Mode7Sprite(Sprite):
+    """Texture rotated, zoomed and squashed into a fixed size canvas.
+
+    Each output pixel is mapped back into the texture, which is affine, so the
+    texture coordinates are the sum of a per-column and a per-row lookup table.
+    The tables only change with the parameters, and the sampled pixels are
+    written straight into the same surface every update, so any rotation can
+    be rendered per frame instead of being precomputed.
+
+    Sampling is nearest neighbour. When zooming out the texture is smoothscaled
+    once per zoom level first, so it doesn't shimmer.
+    """
+
+    image: Surface
     image_original: Surface
     rect: Rect
     _size: Tuple[int, int]
     _perspective: float
     _rotation: float
     _zoom: float
+    dirty: int  # for the compositor, the image is redrawn in place
     _dirty: bool
+    _texture: Optional[np.ndarray]
 
     def __init__(
         self,
         surface: Surface,
         size: Tuple[int, int],
-        perspective: float = 0,
+        perspective: float = 0.5,
         rotation: float = 0,
-        zoom: float = 0,
+        zoom: float = 1.0,
     ) -> None:
+        super().__init__()
         self.image_original = surface
-        self.rect = surface.get_rect()
         self._size = size
         self._perspective = perspective
         self._rotation = rotation
         self._zoom = zoom
         self._dirty = True
+        self.dirty = 1
+        # Surface converted to have per pixel alpha so the transparent border
+        # and the texture share its pixel format
+        if not surface.get_flags() & SRCALPHA:
+            surface = surface.convert_alpha()
+        self.image = Surface(size, SRCALPHA, surface)
+        self.rect = self.image.get_rect()
+        self._texture = None
+        # Reused per update, indexed [x, y] like pygame.surfarray
+        w, h = size
+        self._u = np.empty((w, h), np.float32)
+        self._v = np.empty((w, h), np.float32)
+        self._index = np.empty((w, h), np.intp)
+        self._index_v = np.empty((w, h), np.intp)
         self.update()
 
     @property
@@ -43,6 +75,7 @@ class Mode7Sprite(Sprite):
             if not value == self._zoom:
                 self._dirty = 1
                 self._zoom = value
+                self._texture = None
         else:
             raise ValueError
 
@@ -69,6 +102,12 @@ class Mode7Sprite(Sprite):
             self._dirty = 1
             self._rotation = value % 360
 
+    def set_texture(self, surface: Surface) -> None:
+        self.image_original = surface
+        self._texture = None
+        self._dirty = True
+        self.update()
+
     @property
     def size(self):
         return self.image_original.get_size()
@@ -76,12 +115,59 @@ class Mode7Sprite(Sprite):
     def update(self):
         if not self._dirty:
             return
-        surface = Surface(self._size, SRCALPHA)
-        surface.fill((0, 0, 0, 0))
-        image = rotozoom(self.image_original, self._rotation, self._zoom)
-        w2, h2 = image.get_size()
-        image = smoothscale(image, (w2, int(h2 * self._perspective)))
-        rect = image.get_rect()
-        rect.center = surface.get_rect().center
-        surface.blit(image, rect)
-        self.image = surface
+        if self._texture is None:
+            self._texture = self._build_texture()
+        texture = self._texture
+        tw, th = texture.shape[0] - 2, texture.shape[1] - 2
+        scale = self._sample_scale()
+        col_u, col_v, row_u, row_v = self._lookup_tables(tw, th, scale)
+        u, v, index, index_v = self._u, self._v, self._index, self._index_v
+        # Anything outside the texture clamps into its transparent border
+        np.add(col_u[:, None], row_u[None, :], out=u)
+        np.clip(u, 0, tw + 1, out=u)
+        np.add(col_v[:, None], row_v[None, :], out=v)
+        np.clip(v, 0, th + 1, out=v)
+        # Truncating is flooring, the coordinates are all positive now
+        np.copyto(index, u, casting="unsafe")
+        np.copyto(index_v, v, casting="unsafe")
+        index *= th + 2
+        index += index_v
+        view = pygame.surfarray.pixels2d(self.image)
+        np.take(texture.ravel(), index, out=view)
+        del view  # unlock the surface so it can be blitted
+        self._dirty = False
+        self.dirty = 1
+
+    def _build_texture(self) -> np.ndarray:
+        # Mapped pixels with a one pixel transparent border, shape (w + 2, h + 2)
+        surface = self.image_original.convert(self.image)
+        if self._zoom < 1:
+            w, h = surface.get_size()
+            size = (max(round(w * self._zoom), 1), max(round(h * self._zoom), 1))
+            surface = smoothscale(surface, size)
+        pixels = pygame.surfarray.array2d(surface)
+        # Same dtype as the surface's pixels2d() view, signed or not
+        dtype = pygame.surfarray.pixels2d(self.image).dtype
+        texture = np.zeros((pixels.shape[0] + 2, pixels.shape[1] + 2), dtype)
+        texture[1:-1, 1:-1] = pixels.view(dtype)
+        return texture
+
+    def _sample_scale(self) -> float:
+        # Texture pixels per output pixel, before perspective
+        if self._zoom < 1:
+            return 1.0
+        return 1 / self._zoom
+
+    def _lookup_tables(
+        self, tw: int, th: int, scale: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # Inverse of rotating counterclockwise by rotation, scaling by zoom and
+        # squashing vertically by perspective, about the canvas centre
+        w, h = self._size
+        angle = math.radians(self._rotation)
+        cos, sin = math.cos(angle) * scale, math.sin(angle) * scale
+        dx = np.arange(w, dtype=np.float32) + 0.5 - w / 2
+        dy = (np.arange(h, dtype=np.float32) + 0.5 - h / 2) / self._perspective
+        # +1 for the border, offsets from the texture centre
+        cu, cv = tw / 2 + 1, th / 2 + 1
+        return dx * cos, dx * sin, cu - dy * sin, cv + dy * cos
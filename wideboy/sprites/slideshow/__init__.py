@@ -26,6 +26,7 @@ class SlideshowSprite(Sprite):
     transition: Optional[Transition] = None
     transition_out: bool = False
     transition_state: Dict[str, Any] = {}
+    dirty: int = 0  # for the compositor, transitions draw into the image
 
     def __init__(self, surface: Surface, size: Tuple[int, int]) -> None:
         self.image = self._resize(surface, size)
@@ -43,8 +44,9 @@ class SlideshowSprite(Sprite):
         self.transition_out = True
 
     def update(self) -> None:
-        if self.image_buffer is None:
+        if self.image_buffer is None or self.transition is None:
             return
+        self.dirty = 1
         # If no transition, just swap images
         if self.transition == Transition.NONE:
             self.image = self.image_buffer
@@ -59,11 +61,18 @@ class SlideshowSprite(Sprite):
         elif self.transition == Transition.BLEED:
             self._transition_bleed()
 
+    @property
+    def animating(self) -> bool:
+        return self.transition is not None
+
     def reset_transition(self) -> None:
         self.transition = None
         self.transition_state = {}
 
     def _resize(self, surface: Surface, size: Tuple[int, int]) -> Surface:
+        # Prefetched images are already the right size
+        if surface.get_size() == size:
+            return surface
         return pygame_transform_scale(surface, size)
 
     def _transition_fade(self, speed: int = 8) -> None:
@@ -85,6 +94,7 @@ class SlideshowSprite(Sprite):
             else:
                 image_alpha = 255
                 self.transition_out = True
+                self.image_buffer = None
                 self.reset_transition()
         # Set image alpha
         self.image.set_alpha(image_alpha)
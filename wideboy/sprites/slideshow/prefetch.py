@@ -0,0 +1,103 @@
+import logging
+import pygame
+import threading
+from pathlib import Path
+from pygame import Color, Surface
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..graphics import recolor_image
+
+logger = logging.getLogger(__name__)
+
+Tint = Optional[Tuple[int, int, int]]  # multiplied into the image, None is untinted
+
+
+def prepare_slide(path: Path, size: Tuple[int, int], tint: Tint) -> Surface:
+    # Safe off the main thread, the result still needs convert_alpha()
+    surface = pygame.image.load(str(path))
+    if surface.get_size() != size:
+        surface = pygame.transform.scale(surface, size)
+    if tint is not None:
+        surface = recolor_image(surface, Color(*tint))
+    return surface
+
+
+class SlideshowPrefetcher:
+    """Prepares the next slideshow images on a worker thread.
+
+    The main thread sets the upcoming images with want(), and the worker keeps
+    them decoded, scaled and tinted, so switching image only has to convert
+    one surface. Images prepared with a tint that has since changed are thrown
+    away and prepared again.
+    """
+
+    upcoming: List[Path]
+    ready: Dict[Path, Surface]
+
+    def __init__(self, size: Tuple[int, int], tint: Tint = None) -> None:
+        self.size = size
+        self.tint = tint
+        self.upcoming = []
+        self.ready = dict()
+        self.misses = 0
+        self._stop = False
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="wideboy-slideshow", daemon=True
+        )
+        self._thread.start()
+
+    def want(self, paths: Sequence[Path]) -> None:
+        with self._changed:
+            self.upcoming = list(paths)
+            self._changed.notify()
+
+    def take(self, path: Path, tint: Tint) -> Optional[Surface]:
+        # None if the image isn't prepared yet, the caller should retry later
+        with self._changed:
+            if tint != self.tint:
+                self.tint = tint
+                self.ready.clear()
+                self._changed.notify()
+            prepared = self.ready.pop(path, None)
+        if prepared is None:
+            self.misses += 1
+            return None
+        return prepared.convert_alpha()
+
+    def close(self) -> None:
+        with self._changed:
+            self._stop = True
+            self._changed.notify()
+        self._thread.join(timeout=1.0)
+        logger.debug(f"slideshow.prefetch.close: misses={self.misses}")
+
+    def _wanted(self) -> Optional[Tuple[Path, Tint]]:
+        # First upcoming image that isn't prepared, with the tint to use
+        for path in list(self.ready):
+            if path not in self.upcoming:
+                del self.ready[path]
+        for path in self.upcoming:
+            if path not in self.ready:
+                return path, self.tint
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._changed:
+                wanted = self._wanted()
+                while wanted is None and not self._stop:
+                    self._changed.wait()
+                    wanted = self._wanted()
+                if self._stop:
+                    return
+            assert wanted is not None
+            path, tint = wanted
+            try:
+                surface = prepare_slide(path, self.size, tint)
+            except (OSError, pygame.error) as e:
+                logger.warning(f"slideshow.prefetch: path={path} error={e}")
+                surface = Surface(self.size)
+            with self._changed:
+                # Dropped if the tint changed while it was being prepared
+                if tint == self.tint:
+                    self.ready[path] = surface
@@ -165,6 +165,7 @@ class TileGrid(DirtySprite):
         self.cells = cells
         self.state = state
         self.columns = []
+        self.stale = True  # cells or columns changed since the image was drawn
 
         for column in self.cells:
             column_group: TileGridColumn = TileGridColumn()
@@ -177,12 +178,16 @@ class TileGrid(DirtySprite):
         return f"TileGrid(columns={self.columns})"
 
     def update(self, entity_id=None):
-        dirty = False
+        # Columns re-check their cells' open every update, as it can depend on
+        # other entities than the cell's own
+        for column in self.columns:
+            column.update()
         cx, cy = 0, 0
         width, height = self.calculate_size()
         animating = any([column.animating for column in self.columns])
-        if animating:
-            dirty = True
+        # Nothing to redraw, keep the image so it isn't composited again
+        if not (animating or self.stale or entity_id is not None):
+            return
         self.image = Surface((width, height), SRCALPHA)
         self.image.fill(Color(0, 0, 0, 0))
         for column in self.columns:
@@ -195,16 +200,41 @@ class TileGrid(DirtySprite):
                     cell.update()
                     cell_surface = cell.render()
                     self.tile_surface_cache[cell.entity_id] = cell_surface
-                cell.image = self.tile_surface_cache[cell.entity_id]
+                cell_surface = self.tile_surface_cache[cell.entity_id]
+                # Collapsing cells are cropped to the height they're drawn at
+                cell_height = min(cell.rect.height, cell_surface.get_height())
+                if cell_height < cell_surface.get_height():
+                    cell_surface = cell_surface.subsurface(
+                        (0, 0, cell_surface.get_width(), cell_height)
+                    )
+                cell.image = cell_surface
                 cell.rect.width = column.animator.value
                 cell.rect.x = cx
                 cell.rect.y = cy
                 cy += cell.rect.height
             cx += column.animator.value
-            column.update()
             column.draw(self.image)
         self.rect.width, self.rect.height = self.calculate_size()
-        self.dirty = 1 if dirty else 0
+        # Once more after an animation ends, the last step is drawn next update
+        self.stale = animating
+        self.dirty = 1
+
+    def render_cell(self, entity_id: str) -> None:
+        # Re-render one cell's cached surface, picked up by the next update()
+        for column in self.columns:
+            for cell in column.sprites():
+                if cell.entity_id == entity_id:
+                    cell.update()
+                    self.tile_surface_cache[cell.entity_id] = cell.render()
+                    self.stale = True
+
+    def invalidate(self) -> None:
+        self.tile_surface_cache.clear()
+        self.stale = True
+
+    @property
+    def animating(self) -> bool:
+        return any([column.animating for column in self.columns])
 
     def calculate_size(self) -> Tuple[int, int]:
         width = 0
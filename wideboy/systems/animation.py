@@ -2,15 +2,18 @@ import logging
 from ecs_pattern import EntityManager, System, entity
 
 from pygame.transform import flip as pygame_transform_flip
+from typing import Optional, Tuple
 from ..components import (
-    ComAlpha,
     ComBound,
     ComFade,
     ComFrame,
+    ComMode7,
     ComMotion,
     ComTarget,
     ComVisible,
 )
+from ..consts import FPS_MAX
+from ..entities import AppState
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +21,24 @@ logger = logging.getLogger(__name__)
 class SysAnimation(System):
     def __init__(self, entities: EntityManager) -> None:
         self.entities = entities
+        self.step = 1.0
 
     def start(self) -> None:
         logger.info("Animation system starting...")
+        self.app_state = next(self.entities.get_by_class(AppState))
+        self.time_based = self.app_state.config.general.time_based_animation
 
     def update(self) -> None:
+        if not self.app_state.master_power:
+            return
+        # Speeds, fade speeds and frame delays are expressed per frame at FPS_MAX,
+        # in time-based mode scale them by how many of those frames have elapsed
+        self.step = self.app_state.time_delta * FPS_MAX if self.time_based else 1.0
         self._update_fade()
-        self._update_alpha()
         self._update_target()
         self._update_bound()
         self._update_frame()
+        self._update_mode7()
         self._update_motion()
 
     def _update_fade(self):
@@ -36,23 +47,28 @@ class SysAnimation(System):
             # If no fade target, skip
             if e.fade_target_alpha is None:
                 continue
+            # Whole alpha steps this frame, carrying the fraction to the next
+            e.fade_offset += e.fade_speed * self.step
+            fade_speed = int(e.fade_offset)
+            e.fade_offset -= fade_speed
             # If current alpha is less than target, increase alpha
             if e.alpha < e.fade_target_alpha:
                 # If the difference between current and target is less than the speed, set to target
-                if abs(e.alpha - e.fade_target_alpha) < e.fade_speed:
+                if abs(e.alpha - e.fade_target_alpha) < fade_speed:
                     e.alpha = e.fade_target_alpha
                 else:
-                    e.alpha += e.fade_speed
+                    e.alpha += fade_speed
             # If current alpha is greater than target, decrease alpha
             if e.alpha > e.fade_target_alpha:
                 # If the difference between current and target is less than the speed, set to target
-                if abs(e.alpha - e.fade_target_alpha) < e.fade_speed:
+                if abs(e.alpha - e.fade_target_alpha) < fade_speed:
                     e.alpha = e.fade_target_alpha
                 else:
-                    e.alpha -= e.fade_speed
+                    e.alpha -= fade_speed
             # If current alpha is equal to target, set target to None
             if e.alpha == e.fade_target_alpha:
                 e.fade_target_alpha = None
+                e.fade_offset = 0.0
 
     def _update_target(self):
         # Set speed to move towards target
@@ -119,28 +135,61 @@ class SysAnimation(System):
     def _update_frame(self):
         # Handle frame animation
         for e in self.entities.get_with_component(ComFrame, ComVisible):
+            if e.frame_stream is not None:
+                self._update_frame_stream(e)
+                continue
             # If zero or one frame, skip
             if len(e.frames) <= 1:
                 continue
-            # Only update frame every "frame_delay" frames
-            if e.scene_frame % e.frame_delay == 0:
-                # Set sprite to frame surface at index
+            # Only update frame every "frame_delay" frames (at FPS_MAX)
+            if e.frame_elapsed <= 0:
+                # Set sprite to frame surface at index, frame sets decode
+                # every frame into the same surface so flag it as redrawn
                 e.sprite.image = e.frames[e.frame_index]
-                # Advance or reverse frame index
-                e.frame_index += e.frame_direction
-                if e.frame_index >= len(e.frames):
-                    e.frame_index = 0
-                elif e.frame_index < 0:
-                    e.frame_index = len(e.frames) - 1
+                e.sprite.dirty = 1
+                # Advance or reverse frame index, skipping frames if we fell behind
+                while e.frame_elapsed <= 0:
+                    e.frame_index += e.frame_direction
+                    if e.frame_index >= len(e.frames):
+                        e.frame_index = 0
+                    elif e.frame_index < 0:
+                        e.frame_index = len(e.frames) - 1
+                    e.frame_elapsed += max(e.frame_delay, 1)
+            e.frame_elapsed -= self.step
             # Increment scene frame
             e.scene_frame += 1
 
+    def _update_frame_stream(self, e: entity):
+        # Streamed frames carry their own duration, frame_delay is ignored
+        e.frame_elapsed -= self.step
+        if e.frame_elapsed > 0:
+            return
+        frame = e.frame_stream.next_frame()
+        if frame is None:
+            # Decoder is behind, hold the current frame and retry next update
+            e.frame_elapsed = 0.0
+            return
+        surface, duration = frame
+        e.sprite.image = surface
+        e.frame_elapsed = max(e.frame_elapsed + duration * FPS_MAX, 0.0)
+
+    def _update_mode7(self):
+        # Rendered per frame at whatever angle has been reached
+        for e in self.entities.get_with_component(ComMode7, ComVisible):
+            if e.rotation_speed:
+                e.sprite.rotation += e.rotation_speed * self.step
+                e.sprite.update()
+
     def _update_motion(self):
         # Move entity according to speed and set direction
         for e in self.entities.get_with_component(ComMotion, ComVisible):
-            # Increase or decrease X and Y by speed
-            e.x += e.speed_x
-            e.y += e.speed_y
+            # Increase or decrease X and Y by speed, never overshooting a target
+            e.x, e.offset_x = self._step_position(
+                e.x, e.offset_x, e.speed_x * self.step, getattr(e, "target_x", None)
+            )
+            e.y, e.offset_y = self._step_position(
+                e.y, e.offset_y, e.speed_y * self.step, getattr(e, "target_y", None)
+            )
             # Set direction based on speed
             e.direction_x = 1 if e.speed_x > 0 else -1 if e.speed_x < 0 else 0
             e.direction_y = 1 if e.speed_y > 0 else -1 if e.speed_y < 0 else 0
@@ -153,7 +202,15 @@ class SysAnimation(System):
                     e.frames[e.frame_index], True, False
                 )
 
-    def _update_alpha(self):
-        for e in self.entities.get_with_component(ComAlpha):
-            # Set alpha of sprite image
-            e.sprite.image.set_alpha(e.alpha)
+    def _step_position(
+        self, position: int, offset: float, delta: float, target: Optional[int]
+    ) -> Tuple[int, float]:
+        # Move by whole pixels and carry the sub-pixel remainder
+        offset += delta
+        pixels = int(offset)
+        position += pixels
+        offset -= pixels
+        # If we moved past the target, snap to it
+        if target is not None and (position - target) * delta > 0:
+            return target, 0.0
+        return position, offset
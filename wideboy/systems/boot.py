@@ -1,11 +1,13 @@
 import datetime
 import logging
+import time
 from dynaconf import Dynaconf
 from ecs_pattern import EntityManager, System
 from pygame.constants import KEYDOWN, KEYUP, QUIT, K_UP, K_DOWN, K_ESCAPE
 from pygame.event import get as get_pygame_events
-from ..consts import EventTypes
-from ..entities import AppState, Cache
+from ..consts import EventTypes, FPS_MAX, TIME_DELTA_MAX
+from ..entities import AppState
+from ..scheduler import RATE_EVENTS, RATE_FRAME, Schedule
 
 logger = logging.getLogger(__name__)
 
@@ -22,25 +24,36 @@ class SysBoot(System):
     def start(self) -> None:
         logger.info("Boot system starting...")
         self.entities.init()
-        self.entities.add(Cache())
 
 
 class SysEvents(System):
+    schedule = Schedule(RATE_FRAME, pinned=True)  # drains the frame's events
+
     def __init__(self, entities: EntityManager) -> None:
         self.entities = entities
+        self.monotonic = time.monotonic()
 
     def start(self) -> None:
         logger.info("Events system starting...")
 
     def update(self) -> None:
-        pygame_events = get_pygame_events()
         app_state = next(self.entities.get_by_class(AppState))
-        app_state.events = [(event.type, event.dict) for event in pygame_events]
+        # Frame start: measure the frame delta (this system must run every frame)
+        monotonic = time.monotonic()
+        time_delta = min(monotonic - self.monotonic, TIME_DELTA_MAX)
+        if app_state.idle:
+            # The last frame slept until an event woke it, nothing was moving
+            # then, so don't animate across the sleep
+            time_delta = min(time_delta, 1.0 / FPS_MAX)
+        app_state.time_delta = time_delta
+        app_state.frame_start = self.monotonic = monotonic
+        for event in get_pygame_events():
+            app_state.event_queue.push(event.type, event.dict)
+        # Single drain point: every system sees the same batch this frame
+        app_state.events = app_state.event_queue.drain()
         # logger.debug(
-        #     f"sys.events.update: events={len(app_state.events)} pygame_events={len(pygame_events)}"
+        #     f"sys.events.update: events={len(app_state.events)} queue={app_state.event_queue.stats()}"
         # )
-        # if len(app_state.events) > 0:
-        #     logger.debug(f"sys.events.update: {app_state.events}")
 
 
 class SysClock(System):
@@ -57,21 +70,23 @@ class SysClock(System):
         if now.second != self.now.second:
             app_state = next(self.entities.get_by_class(AppState))
             app_state.time_now = now
-            self.app_state.events.append(
-                (EventTypes.EVENT_CLOCK_NEW_SECOND, dict(unit=now.second, now=now))
+            self.app_state.event_queue.push(
+                EventTypes.EVENT_CLOCK_NEW_SECOND, dict(unit=now.second, now=now)
             )
             if now.second == 0 and now.minute != self.now.minute:
-                self.app_state.events.append(
-                    (EventTypes.EVENT_CLOCK_NEW_MINUTE, dict(unit=now.minute, now=now))
+                self.app_state.event_queue.push(
+                    EventTypes.EVENT_CLOCK_NEW_MINUTE, dict(unit=now.minute, now=now)
                 )
                 if now.minute == 0 and now.hour != self.now.hour:
-                    self.app_state.events.append(
-                        (EventTypes.EVENT_CLOCK_NEW_HOUR, dict(unit=now.hour, now=now))
+                    self.app_state.event_queue.push(
+                        EventTypes.EVENT_CLOCK_NEW_HOUR, dict(unit=now.hour, now=now)
                     )
             self.now = now
 
 
 class SysInput(System):
+    schedule = Schedule(RATE_EVENTS, event_types=(KEYDOWN, KEYUP, QUIT))
+
     def __init__(self, entities: EntityManager) -> None:
         self.entities = entities
         self.event_types = (KEYDOWN, KEYUP, QUIT)  # Whitelist
@@ -91,6 +106,11 @@ class SysInput(System):
 
 
 class SysDebug(System):
+    schedule = Schedule(
+        RATE_EVENTS,
+        event_types=(EventTypes.EVENT_DEBUG_LOG, EventTypes.EVENT_CLOCK_NEW_MINUTE),
+    )
+
     def __init__(self, entities: EntityManager) -> None:
         self.entities = entities
 
@@ -104,3 +124,4 @@ class SysDebug(System):
                 logger.debug(f"sys.debug.log: {event_payload['msg']}")
             if event_type == EventTypes.EVENT_CLOCK_NEW_MINUTE:
                 logger.debug(f"sys.debug.clock: {event_payload['now']}")
+                logger.debug(f"sys.debug.events: {self.app_state.event_queue.stats()}")
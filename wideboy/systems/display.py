@@ -7,7 +7,7 @@ from pygame import Color
 from pygame.image import tostring as image_to_string
 from pygame.surface import Surface
 from PIL import Image
-from typing import Any
+from typing import Any, Optional
 from ..entities import AppState
 from ..sprites.graphics import build_surface
 
@@ -26,26 +26,54 @@ class SysDisplay(System):
     screen_off: Surface
     config: Dynaconf
     enabled: bool
+    matrix: Any
 
-    def __init__(self, entities: EntityManager, screen: Surface) -> None:
+    def __init__(
+        self, entities: EntityManager, screen: Surface, matrix: Optional[Any] = None
+    ) -> None:
         self.entities = entities
         self.screen = screen
         self.screen_off = build_surface(screen.get_size(), Color(0, 0, 0))
         self.config = next(self.entities.get_by_class(AppState)).config
-        self.enabled = self.config.display.matrix.enabled
+        # An injected matrix (e.g. a fake driver for benchmarks) forces output on
+        self.matrix = matrix
+        self.enabled = self.config.display.matrix.enabled or matrix is not None
+        self.blanked = False
+        self.serial = -1  # canvas_serial last pushed to the matrix
+        self.brightness = -1
 
     def start(self) -> None:
         if not self.enabled:
             logger.info("Display system disabled")
             return
         logger.info("Display system starting...")
-        self._setup_matrix_driver()
+        if self.matrix is None:
+            self._setup_matrix_driver()
+        else:
+            self.buffer = self.matrix.CreateFrameCanvas()
 
     def update(self) -> None:
         app_state = next(self.entities.get_by_class(AppState))
         if not self.enabled:
             return
-        render_surface = self.screen if app_state.master_power else self.screen_off
+        # Standby: push a single blank frame, then leave the matrix alone
+        if not app_state.master_power:
+            if self.blanked:
+                return
+            render_surface = self.screen_off
+            self.blanked = True
+        else:
+            # The matrix keeps showing the last frame, only push changes
+            if (
+                not self.blanked
+                and app_state.canvas_serial == self.serial
+                and app_state.master_brightness == self.brightness
+            ):
+                return
+            render_surface = self.screen
+            self.blanked = False
+            self.serial = app_state.canvas_serial
+        self.brightness = app_state.master_brightness
         self.buffer.SetImage(surface_to_led_matrix(render_surface))
         self.matrix.brightness = (app_state.master_brightness / 255) * 100
         self.matrix.SwapOnVSync(self.buffer)
@@ -1,38 +1,63 @@
 import logging
 import os
 from datetime import datetime
-from ecs_pattern import EntityManager, System
+from ecs_pattern import System
 from pygame.image import save as pygame_image_save
 from pygame.surface import Surface
-from ..components import ComVisible
+from ..compositor import Compositor
 from ..entities import AppState
+from ..render_list import RenderEntityManager
 
 logger = logging.getLogger(__name__)
 
 
 class SysDraw(System):
-    def __init__(self, entities: EntityManager, screen: Surface) -> None:
+    def __init__(self, entities: RenderEntityManager, screen: Surface) -> None:
         self.entities = entities
+        self.render_list = entities.render_list
         self.screen = screen
+        self.blanked = False
 
     def start(self) -> None:
         logger.info("Draw system starting...")
         self.app_state = next(self.entities.get_by_class(AppState))
+        config = self.app_state.config.display.compositor
+        self.damage_tracking = config.damage
+        self.compositor = Compositor(
+            self.screen, full_redraw=config.full_redraw, bands=config.layers
+        )
 
     def update(self) -> None:
-        self.screen.fill((0, 0, 0))
-        visible_entities = self.entities.get_with_component(ComVisible)
-        sorted_visible = sorted(visible_entities, key=lambda x: x.z_order)
+        app_state = self.app_state
+        # Standby: clear once and stop compositing until power returns
+        if not app_state.master_power:
+            if not self.blanked:
+                self.screen.fill((0, 0, 0))
+                self.blanked = True
+                self.compositor.invalidate()
+                app_state.damage = [self.screen.get_rect()]
+                app_state.canvas_serial += 1
+            else:
+                app_state.damage = []
+            return
+        self.blanked = False
 
-        for e in sorted_visible:
-            if e.hidden:
-                continue
-            self.screen.blit(e.sprite.image, (e.x, e.y))
+        if not self.damage_tracking:
+            self.compositor.invalidate()
+        self.render_list.refresh()
+        app_state.damage = self.compositor.draw(self.render_list)
+        app_state.profiler.count("draw.culled", self.compositor.culled)
+        app_state.profiler.count("draw.clipped", self.compositor.clipped)
+        if app_state.damage:
+            app_state.canvas_serial += 1
 
         if self.app_state.screenshot:
             self.screenshot()
             self.app_state.screenshot = False
 
+    def stop(self) -> None:
+        logger.info(f"sys.draw.stop: stats={self.compositor.stats()}")
+
     def screenshot(self) -> None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         filename = f"screenshot_{timestamp}.png"
@@ -0,0 +1,93 @@
+import logging
+import time
+from ecs_pattern import EntityManager, System
+from pygame.time import Clock
+from ..components import (
+    ComFade,
+    ComFrame,
+    ComMode7,
+    ComMotion,
+    ComTarget,
+    ComVisible,
+)
+from ..consts import FPS_MAX
+from ..entities import AppState
+
+logger = logging.getLogger(__name__)
+
+CLOCK_WAKE_MARGIN = 0.005  # secs after the second boundary so SysClock sees it
+
+
+class SysGovernor(System):
+    def __init__(self, entities: EntityManager) -> None:
+        self.entities = entities
+        self.idle_since = time.monotonic()
+
+    def start(self) -> None:
+        logger.info("Governor system starting...")
+        self.app_state = next(self.entities.get_by_class(AppState))
+        self.config = self.app_state.config.display.governor
+
+    def update(self) -> None:
+        if not self.config.enabled:
+            return
+        now = time.monotonic()
+        # Preloads and background jobs progress once per frame, so keep it fast
+        booting = (
+            self.app_state.booting
+            or self.app_state.preloading
+            or len(self.app_state.jobs) > 0
+        )
+        standby = not self.app_state.master_power
+        # Ramp up immediately, only go idle once nothing has moved for a while
+        if booting or (not standby and self._animating()):
+            self.idle_since = now
+        # Nothing is rendered in standby, so idle straight away (unless booting)
+        idle = not booting and (
+            standby or now - self.idle_since >= self.config.idle_delay
+        )
+        if idle != self.app_state.idle:
+            logger.debug(f"sys.governor.update: idle={idle}")
+        self.app_state.idle = idle
+
+    def _animating(self) -> bool:
+        entities = self.entities
+        return (
+            any(
+                e.fade_target_alpha is not None
+                for e in entities.get_with_component(ComFade)
+            )
+            or any(
+                e.target_x is not None or e.target_y is not None
+                for e in entities.get_with_component(ComTarget)
+            )
+            or any(
+                (e.speed_x or e.speed_y) and not e.hidden
+                for e in entities.get_with_component(ComMotion, ComVisible)
+            )
+            or any(
+                (len(e.frames) > 1 or e.frame_stream is not None) and not e.hidden
+                for e in entities.get_with_component(ComFrame, ComVisible)
+            )
+            or any(
+                e.rotation_speed and not e.hidden
+                for e in entities.get_with_component(ComMode7, ComVisible)
+            )
+            # Sprites with their own internal animation (slideshow, tile grid)
+            or any(
+                getattr(e.sprite, "animating", False)
+                for e in entities.get_with_component(ComVisible)
+            )
+        )
+
+
+def governor_tick(app_state: AppState, clock: Clock) -> None:
+    if not app_state.idle:
+        clock.tick(FPS_MAX)
+        return
+    # Sleep until an event arrives, the next wall clock second, or the idle rate
+    until_next_second = 1.0 - (time.time() % 1.0) + CLOCK_WAKE_MARGIN
+    fps_idle = max(app_state.config.display.governor.fps_idle, 1)
+    timeout = min(until_next_second, 1.0 / fps_idle)
+    app_state.event_queue.wait(timeout)
+    clock.tick()
@@ -0,0 +1,37 @@
+import logging
+from ecs_pattern import EntityManager, System
+from ..consts import EventTypes, FPS_MAX
+from ..entities import AppState
+from ..scheduler import RATE_FRAME, Schedule
+
+logger = logging.getLogger(__name__)
+
+
+class SysJobs(System):
+    """Runs background jobs in the rest of the frame budget.
+
+    Must be the last system, so the budget left is what the frame's other
+    systems didn't use, measured from SysEvents starting the frame.
+    """
+
+    schedule = Schedule(RATE_FRAME, pinned=True)
+
+    def __init__(self, entities: EntityManager) -> None:
+        self.entities = entities
+
+    def start(self) -> None:
+        logger.info("Jobs system starting...")
+        self.app_state = next(self.entities.get_by_class(AppState))
+        self.jobs = self.app_state.jobs
+        self.budget = self.app_state.config.jobs.budget / FPS_MAX
+
+    def update(self) -> None:
+        jobs = self.jobs
+        if jobs.queue:
+            jobs.run(self.app_state.frame_start + self.budget)
+        for event_type, _ in self.app_state.events:
+            if event_type == EventTypes.EVENT_CLOCK_NEW_MINUTE and jobs.steps:
+                logger.debug(f"sys.jobs.stats: {jobs.stats()}")
+
+    def stop(self) -> None:
+        logger.info(f"sys.jobs.stop: stats={self.jobs.stats()}")
@@ -1,25 +1,38 @@
 import json
 import logging
-import time
 from ecs_pattern import EntityManager, System
 from paho.mqtt.client import Client as MQTTClient, MQTTMessage
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Type
 from ..consts import EventTypes
 from ..entities import AppState, MQTTService
 from ..homeassistant import HomeAssistantEntity
+from ..scheduler import RATE_EVENTS, Schedule
 
 
 logger = logging.getLogger(__name__)
 
-MQTT_RECONNECT_WAIT = 5  # secs
-
 
 class SysMQTT(System):
-    def __init__(self, entities: EntityManager, auto_connect=False) -> None:
+    app_state: AppState
+    topic_prefix_statestream: str
+    schedule = Schedule(
+        RATE_EVENTS,
+        event_types=(
+            EventTypes.EVENT_MQTT_CONNECT,
+            EventTypes.EVENT_MQTT_DISCONNECT,
+            EventTypes.EVENT_MQTT_MESSAGE,
+        ),
+    )
+
+    def __init__(
+        self,
+        entities: EntityManager,
+        auto_connect=False,
+        client: Optional[MQTTClient] = None,
+    ) -> None:
         self.entities = entities
         self.auto_connect = auto_connect
-        self.app_state = None
-        self.client = MQTTClient()
+        self.client = client or MQTTClient()
         self.mqtt_connected = False
 
     def start(self) -> None:
@@ -33,9 +46,16 @@ class SysMQTT(System):
         self.client.username_pw_set(
             self.app_state.config.mqtt.user, self.app_state.config.mqtt.password
         )
+        self.topic_prefix_statestream = (
+            self.app_state.config.mqtt.topic_prefix.homeassistant.statestream
+        )
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self.client.on_message = self._on_message
+        self.client.reconnect_delay_set(
+            min_delay=self.app_state.config.mqtt.reconnect_min_delay,
+            max_delay=self.app_state.config.mqtt.reconnect_max_delay,
+        )
         if self.app_state.config.mqtt.log_messages:
             on_message_listeners.append(self.debug_message_listener)
         self.entities.add(
@@ -45,25 +65,41 @@ class SysMQTT(System):
                 on_connect_listeners=on_connect_listeners,
                 on_disconnect_listeners=on_disconnect_listeners,
                 on_message_listeners=on_message_listeners,
-            )
+            )  # type: ignore[call-arg]
         )
         if self.auto_connect:
             self.connect()
 
     def update(self) -> None:
-        try:
-            self.client.loop(timeout=0.01)
-        except Exception as e:
-            logger.error(f"sys.mqtt.update: exception={e}")
-        if not self.mqtt_connected:
-            logger.warn(
-                f"sys.mqtt.reconnect: connected={self.mqtt_connected} retry={MQTT_RECONNECT_WAIT}s"
-            )
-            time.sleep(MQTT_RECONNECT_WAIT)
-            try:
-                self.client.reconnect()
-            except Exception as e:
-                logger.error(f"sys.mqtt.reconnect: exception={e}")
+        mqtt_service = next(self.entities.get_by_class(MQTTService))
+        for event_type, event_payload in self.app_state.events:
+            if event_type == EventTypes.EVENT_MQTT_MESSAGE:
+                self._dispatch(
+                    mqtt_service.on_message_listeners,
+                    event_payload["topic"],
+                    event_payload["payload"],
+                    self.client,
+                )
+            elif event_type == EventTypes.EVENT_MQTT_CONNECT:
+                self._dispatch(
+                    mqtt_service.on_connect_listeners,
+                    self.client,
+                    None,
+                    event_payload["flags"],
+                    event_payload["rc"],
+                )
+            elif event_type == EventTypes.EVENT_MQTT_DISCONNECT:
+                self._dispatch(
+                    mqtt_service.on_disconnect_listeners,
+                    self.client,
+                    None,
+                    event_payload["rc"],
+                )
+
+    def stop(self) -> None:
+        logger.info("MQTT system stopping...")
+        self.client.disconnect()
+        self.client.loop_stop()
 
     def debug_connect_listener(
         self, client: MQTTClient, userdata: Any, flags: Any, rc: int
@@ -80,34 +116,49 @@ class SysMQTT(System):
     ) -> None:
         logger.debug(f"sys.mqtt.message: topic: {topic}, payload: {payload}")
 
+    def _dispatch(self, listeners: List, *args: Any) -> None:
+        for listener in listeners:
+            try:
+                listener(*args)
+            except Exception as e:
+                logger.error(f"sys.mqtt.dispatch: exception={e}", exc_info=e)
+
+    # Network thread callbacks: never touch entities here, just queue events
+
     def _on_connect(self, client: MQTTClient, userdata: Any, flags: Any, rc: int):
         self.mqtt_connected = rc == 0
-        mqtt_service = next(self.entities.get_by_class(MQTTService))
-        for listener in mqtt_service.on_connect_listeners:
-            listener(client, userdata, flags, rc)
+        self.app_state.event_queue.push(
+            EventTypes.EVENT_MQTT_CONNECT, dict(flags=flags, rc=rc)
+        )
 
     def _on_disconnect(self, client: MQTTClient, userdata: Any, rc: int):
-        self.mqtt_connected = rc == 0
-        mqtt_service = next(self.entities.get_by_class(MQTTService))
-        for listener in mqtt_service.on_disconnect_listeners:
-            listener(client, userdata, rc)
+        self.mqtt_connected = False
+        if rc != 0:
+            logger.warning(f"sys.mqtt.disconnect: unexpected rc={rc}, reconnecting")
+        self.app_state.event_queue.push(EventTypes.EVENT_MQTT_DISCONNECT, dict(rc=rc))
 
     def _on_message(
         self, client: MQTTClient, userdata: Any, message: MQTTMessage
     ) -> None:
-        mqtt_service = next(self.entities.get_by_class(MQTTService))
-        topic = message.topic
-        payload = message.payload.decode("utf-8")
-        for listener in mqtt_service.on_message_listeners:
-            listener(topic, payload, client)
+        payload = dict(topic=message.topic, payload=message.payload.decode("utf-8"))
+        if message.topic.startswith(f"{self.topic_prefix_statestream}/"):
+            # Retained states are all replayed on connect, only the latest of
+            # each matters and none can be dropped
+            self.app_state.event_queue.push_latest(
+                message.topic, EventTypes.EVENT_MQTT_MESSAGE, payload
+            )
+        else:
+            self.app_state.event_queue.push(EventTypes.EVENT_MQTT_MESSAGE, payload)
 
     def connect(self):
-        self.client.connect(
+        # Non-blocking: the paho network thread connects and reconnects (with
+        # exponential backoff) in the background, so the render loop never waits
+        self.client.connect_async(
             self.app_state.config.mqtt.host,
             self.app_state.config.mqtt.port,
             self.app_state.config.mqtt.keepalive,
         )
-        self.client.loop()
+        self.client.loop_start()
 
 
 class SysHomeAssistant(System):
@@ -118,7 +169,7 @@ class SysHomeAssistant(System):
     commands: Dict[str, HomeAssistantEntity] = {}
 
     def __init__(
-        self, entities: EntityManager, hass_entities: List[HomeAssistantEntity]
+        self, entities: EntityManager, hass_entities: List[Type[HomeAssistantEntity]]
     ) -> None:
         self.entities = entities
         self.hass_entities = hass_entities
@@ -189,11 +240,10 @@ class SysHomeAssistant(System):
             parts = topic[len(self.topic_prefix_statestream) :].split("/")
             device_class, entity_id, attr = parts[1], parts[-2], parts[-1]
             entity_id_full = f"{device_class}.{entity_id}"
-            app_state.events.append(
-                (
-                    EventTypes.EVENT_HASS_ENTITY_UPDATE,
-                    dict(entity_id=entity_id_full, attribute=attr, payload=payload),
-                )
+            app_state.event_queue.push_latest(
+                (entity_id_full, attr),
+                EventTypes.EVENT_HASS_ENTITY_UPDATE,
+                dict(entity_id=entity_id_full, attribute=attr, payload=payload),
             )
             if entity_id_full not in app_state.hass_state:
                 app_state.hass_state[entity_id_full] = dict()
@@ -1,195 +1,431 @@
 import logging
+import multiprocessing
+import os
+import pygame
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
 from ecs_pattern import EntityManager, System
 from pygame import Surface
-from pygame.display import Info as DisplayInfo
-from typing import Callable, Generator, List, Tuple
-from ..entities import AppState, Cache, WidgetSysMessage
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from ..assets import MB, AssetManager
+from ..components import ComFrame, ComMode7
+from ..entities import AppState, WidgetSysMessage
+from ..hot_reload import SourceWatcher
+from ..jobs import JOB_PRIORITY_HIGH, JOB_PRIORITY_LOW
 from ..sprites.graphics import load_image, load_gif
-from .scene.sprites import build_mode7_sprite, build_system_message_sprite
+from ..sprites.frame_set import CompactFrameSet, frames_instance, frames_source
+from .scene import stage_for_mode
+from .scene.sprites import build_system_message_sprite
 
 logger = logging.getLogger(__name__)
 
-# Preprocessing Functions
+# Raw pixels as passed back from the worker processes
+RawFrame = Tuple[Tuple[int, int], bytes]
+RAW_FORMAT: Final = "RGBA"
+
+# Preprocessing Jobs
+#
+# These run in worker processes without a display, so they return raw pixel
+# buffers which the main thread converts into display format surfaces.
+
+
+def raw_frame(surface: Surface) -> RawFrame:
+    return (surface.get_size(), pygame.image.tobytes(surface, RAW_FORMAT))
+
+
+def surface_from_raw(frame: RawFrame) -> Surface:
+    size, pixels = frame
+    return pygame.image.frombytes(pixels, size, RAW_FORMAT).convert_alpha()
 
 
 def preprocess_load_spritesheet(
-    cache: Cache,
-    key: str,
     path: str,
     size: Tuple[int, int],
     tile_range: Tuple[int, int],
-):
-    logger.debug(f"preprocess_load_spritesheet: key={key} path={path} size={size}")
-    if key not in cache.surfaces:
-        cache.surfaces[key] = []
-    sheet = load_image(path)
+) -> List[RawFrame]:
+    logger.debug(f"preprocess_load_spritesheet: path={path} size={size}")
+    sheet = load_image(path, convert_alpha=False)
+    frames = []
     idx = 0
     for y in range(0, sheet.get_height(), size[1]):
         for x in range(0, sheet.get_width(), size[0]):
             if tile_range[0] <= idx <= tile_range[1]:
-                cache.surfaces[key].append(sheet.subsurface((x, y, size[0], size[1])))
+                frames.append(raw_frame(sheet.subsurface((x, y, size[0], size[1]))))
             idx += 1
+    return frames
 
 
-def preprocess_load_image(cache: Cache, key: str, path: str):
-    logger.debug(f"preprocess_load_image: key={key} path={path}")
-    if key not in cache.surfaces:
-        cache.surfaces[key] = []
-    cache.surfaces[key].append(load_image(path))
+def preprocess_load_gif(path: str) -> List[RawFrame]:
+    logger.debug(f"preprocess_load_gif: path={path}")
+    return [raw_frame(surface) for surface in load_gif(path, convert_alpha=False)]
+
 
+def preprocess_load_texture(path: str) -> List[RawFrame]:
+    logger.debug(f"preprocess_load_texture: path={path}")
+    return [raw_frame(load_image(path, convert_alpha=False))]
 
-def preprocess_load_gif(cache: Cache, key: str, path: str):
-    logger.debug(f"preprocess_load_gif: key={key} path={path}")
-    if key not in cache.surfaces:
-        cache.surfaces[key] = []
-    surfaces = load_gif(path)
-    cache.surfaces[key] = surfaces
 
+# Main Thread Preprocessing Functions
 
-def preprocess_text(cache: Cache, key: str, text: str):
+
+def preprocess_load_image(assets: AssetManager, key: str, path: str):
+    logger.debug(f"preprocess_load_image: key={key} path={path}")
+    assets.store(key, [load_image(path)])
+
+
+def preprocess_text(assets: AssetManager, key: str, text: str):
     logger.debug(f"preprocess_text: key={key} text={text}")
     sprite = build_system_message_sprite(text)
-    if key not in cache.surfaces:
-        cache.surfaces[key] = []
-    cache.surfaces[key].append(sprite.image)
-
-
-def preprocess_mode7(
-    cache: Cache,
-    key: str,
-    surface: Surface,
-    canvas_size: Tuple[int, int],
-    perspective=0.5,
-    rotation=0.0,
-    zoom=1.0,
-):
-    logger.debug(
-        f"preprocess_mode7: key={key} canvas_size={canvas_size} perspective={perspective} rotation={rotation} zoom={zoom}"
-    )
-
-    if key not in cache.surfaces:
-        cache.surfaces[key] = []
-    sprite = build_mode7_sprite(
-        surface,
-        canvas_size,
-        perspective=perspective,
-        rotation=rotation,
-        zoom=zoom,
-    )
-    cache.surfaces[key].append(sprite.image)
+    assets.store(key, [sprite.image])
+
+
+@dataclass
+class PreprocessJob:
+    key: str  # asset key the frames are appended to
+    description: str
+    func: Callable[..., List[RawFrame]]
+    path: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    compact: bool = False  # may be stored as a CompactFrameSet
+    surfaces: Optional[List[Surface]] = None  # set once loaded or rendered
+    future: Optional["Future[List[RawFrame]]"] = None
+    error: Optional[BaseException] = None  # set if rendering failed
 
 
 class SysPreprocess(System):
+    """Loads assets on demand, rendering them on a process pool.
+
+    Keys requested from the asset manager (by booting, or by a stage acquiring
+    them) are expanded into jobs. Jobs missing from the disk cache are
+    submitted to the pool straight away (or, without a pool, queued as
+    background jobs on the main thread), then each frame the finished jobs are
+    collected in submission order, so assets split over several jobs keep
+    their frame order, and wrapped as surfaces.
+
+    Boot ends as soon as the current stage's assets are ready. Other assets are
+    then preloaded in the background while they fit in the memory budget.
+
+    With hot reload, the source files of loaded assets are polled. A changed
+    file re-renders just the keys built from it, then the new frames replace
+    the old ones in any entity showing them, all in the same frame.
+    """
+
     entities: EntityManager
     app_state: AppState
-    cache: Cache
-    queue: List[Tuple[Callable, Tuple]] = []
-    queue_length: int = 0
-    step_index: int = 0
+    assets: AssetManager
+    sources: Dict[str, List[PreprocessJob]]
+    jobs: Deque[PreprocessJob]
+    jobs_remaining: Counter
+    loading: Dict[str, List[Surface]]
+    preload: Deque[str]
+    replacing: Dict[str, Sequence[Surface]]
+    jobs_total: int = 0
+    jobs_done: int = 0
 
     def __init__(self, entities: EntityManager) -> None:
         self.entities = entities
-        self.display_info = DisplayInfo()
-        self.task_gen = self.tasks()
+        self.jobs = deque()
+        self.jobs_remaining = Counter()
+        self.loading = dict()
+        self.replacing = dict()
+        self.watcher: Optional[SourceWatcher] = None
+        self.pool: Optional[ProcessPoolExecutor] = None
 
     def start(self) -> None:
         logger.info("Preprocessing system starting...")
         self.app_state = next(self.entities.get_by_class(AppState))
-        self.cache = next(self.entities.get_by_class(Cache))
+        self.assets = self.app_state.assets
+        self.config = self.app_state.config.preprocess
+        self.sources = dict()
+        for job in self.build_jobs():
+            self.sources.setdefault(job.key, []).append(job)
+        self.parallel = self.config.parallel and self._worth_parallel()
+        self.preload = deque(
+            self.sources if self.app_state.config.assets.preload else ()
+        )
+        self.pruned = False
+        if self.config.hot_reload:
+            self.watcher = SourceWatcher()
+            for key, jobs in self.sources.items():
+                for job in jobs:
+                    self.watcher.watch(job.path, (key,))
+            self.watch_due = time.monotonic()
+
+    def stop(self) -> None:
+        self._shutdown()
 
     def update(self) -> None:
-        if not self.app_state.booting:
-            # logger.debug(f"sys.preprocess.update: booting={self.app_state.booting}")
+        assets = self.assets
+        booting = self.app_state.booting
+        if self.watcher is not None and not booting:
+            self._watch()
+        if not (booting or self.jobs or assets.requested or self.preload):
             return
 
-        if not self.cache:
-            return
+        stage = stage_for_mode(self.app_state.scene_mode)
+        if booting:
+            # Re-requested every frame, the scene mode can change while booting
+            assets.request(stage.assets)
+        for key in sorted(assets.requested):
+            self._enqueue(key)
+        if not booting and not self.jobs:
+            self._preload_next()
 
-        try:
-            desc = next(self.task_gen)
-            self._progress(f"Asset: {desc}")
-            self.step_index += 1
-        except StopIteration:
+        if self.jobs:
+            self._collect()
+            if not (self.jobs or assets.requested or self.preload):
+                self._finish()
+        self.app_state.preloading = bool(self.jobs or assets.requested or self.preload)
+
+        if booting and assets.ready(stage.assets):
+            logger.info(
+                f"sys.preprocess.boot: ready={self.jobs_done}/{self.jobs_total} mode={self.app_state.scene_mode}"
+            )
             self.app_state.booting = False
             self._progress(visible=False)
 
+    def _preload_next(self) -> None:
+        # Each key is only preloaded once, evicted keys reload when acquired
+        if not self.assets.fits():
+            logger.info(
+                f"sys.preprocess.preload: budget reached, skipped={list(self.preload)}"
+            )
+            self.preload.clear()
+        while self.preload:
+            key = self.preload.popleft()
+            if key not in self.assets:
+                self._enqueue(key)
+                return
+
+    def _watch(self) -> None:
+        now = time.monotonic()
+        if now < self.watch_due:
+            return
+        self.watch_due = now + self.config.hot_reload_interval
+        assert self.watcher is not None
+        for key in sorted(self.watcher.poll()):
+            # Keys that aren't loaded pick up the change whenever they load
+            if key in self.assets and key not in self.loading:
+                logger.info(f"sys.preprocess.reload: key={key}")
+                self.replacing[key] = self.assets.frames[key]
+                self._enqueue(key, reload=True)
+
+    def _enqueue(self, key: str, reload: bool = False) -> None:
+        if key in self.loading or (key in self.assets and not reload):
+            return
+        if key not in self.sources:
+            logger.warning(f"sys.preprocess.enqueue: unknown asset key={key}")
+            self.assets.requested.discard(key)
+            return
+        jobs = [replace(job) for job in self.sources[key]]
+        self.loading[key] = []
+        self.jobs_remaining[key] = len(jobs)
+        self.jobs_total += len(jobs)
+        pending = []
+        for job in jobs:
+            if self.assets.disk:
+                job.surfaces = self.assets.disk.load(self._disk_key(job))
+            if job.surfaces is None:
+                pending.append(job)
+        self.jobs.extend(jobs)
+        pool = self._pool() if pending else None
+        logger.debug(
+            f"sys.preprocess.enqueue: key={key} jobs={len(jobs)} cached={len(jobs) - len(pending)} parallel={pool is not None}"
+        )
+        # Something is waiting on requested keys, preloads can wait
+        priority = (
+            JOB_PRIORITY_HIGH if key in self.assets.requested else JOB_PRIORITY_LOW
+        )
+        for job in pending:
+            if pool is not None:
+                job.future = pool.submit(job.func, job.path, **job.params)
+            else:
+                self.app_state.jobs.submit(
+                    self._render(job), f"preprocess.{job.key}", priority
+                )
+
+    def _worth_parallel(self) -> bool:
+        # Spawning the workers takes ~0.3s and decoding ~40ms per MB of PNG, so
+        # with 3 workers the pool only pays for itself from ~11MB of sources
+        paths = {job.path for jobs in self.sources.values() for job in jobs}
+        size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        worth: bool = size >= self.config.parallel_min_mb * MB
+        if not worth:
+            logger.info(
+                f"sys.preprocess.pool: serial sources={size / MB:.1f}MB parallel_min={self.config.parallel_min_mb}MB"
+            )
+        return worth
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.pool is None and self.parallel:
+            # By default leave a core for the main loop, single core boxes stay serial
+            workers = self.config.workers or (os.cpu_count() or 1) - 1
+            if workers < 1:
+                return None
+            logger.info(f"sys.preprocess.pool: workers={workers}")
+            # Spawn rather than fork, the parent already has SDL and network threads
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.pool
+
+    def _render(self, job: PreprocessJob) -> Iterator[None]:
+        # Not parallel: rendered on the main thread as a background job
+        try:
+            frames = job.func(job.path, **job.params)
+        except Exception as e:
+            job.error = e
+            return
+        yield
+        job.surfaces = self._surfaces(job, frames)
+
+    def _collect(self) -> None:
+        description = None
+        while self.jobs:
+            job = self.jobs[0]
+            if job.surfaces is None and job.error is None:
+                # Still rendering, on the pool or as a background job
+                if job.future is None or not job.future.done():
+                    break
+                job.error = job.future.exception()
+                if job.error is None:
+                    job.surfaces = self._surfaces(job, job.future.result())
+            if job.surfaces is None:
+                self._failed(job)
+                continue
+            self.loading[job.key].extend(job.surfaces)
+            self.jobs.popleft()
+            self.jobs_done += 1
+            self.jobs_remaining[job.key] -= 1
+            if not self.jobs_remaining[job.key]:
+                self._store(job)
+            description = job.description
+        if description is not None and self.app_state.booting:
+            self._progress(f"Assets {self.jobs_done}/{self.jobs_total}: {description}")
+
+    def _store(self, job: PreprocessJob) -> None:
+        frames: Sequence[Surface] = self.loading.pop(job.key)
+        mode = self.app_state.config.assets.compact
+        if mode and job.compact and len(frames) > 1:
+            frames = CompactFrameSet(frames, mode)
+            logger.info(
+                f"sys.preprocess.compact: key={job.key} mode={mode} raw={frames.raw_bytes / MB:.1f}MB stored={frames.stored_bytes / MB:.1f}MB saved={frames.saved_ratio:.0%}"
+            )
+        self.assets.store(job.key, frames)
+        if job.key in self.replacing:
+            self._swap(self.replacing.pop(job.key), frames)
+
+    def _failed(self, job: PreprocessJob) -> None:
+        assert job.error is not None
+        if job.key not in self.replacing:
+            raise job.error
+        # A half saved file, or a broken edit: keep showing the loaded frames
+        logger.warning(f"sys.preprocess.reload: key={job.key} error={job.error}")
+        del self.replacing[job.key]
+        del self.loading[job.key]
+        del self.jobs_remaining[job.key]
+        self.jobs = deque(other for other in self.jobs if other.key != job.key)
+
+    def _swap(self, old: Sequence[Surface], new: Sequence[Surface]) -> None:
+        # Entities hold the frame set itself, not its key
+        swapped = 0
+        for e in self.entities.get_with_component(ComFrame):
+            if frames_source(e.frames) is old:
+                e.frames = frames_instance(new)
+                e.frame_index %= len(new)
+                e.sprite.image = new[e.frame_index]
+                swapped += 1
+        if len(old) == 1:
+            for e in self.entities.get_with_component(ComMode7):
+                if e.sprite.image_original is old[0]:
+                    e.sprite.set_texture(new[0])
+                    swapped += 1
+        logger.info(f"sys.preprocess.swap: frames={len(new)} entities={swapped}")
+
+    def _surfaces(self, job: PreprocessJob, frames: List[RawFrame]) -> List[Surface]:
+        surfaces = [surface_from_raw(frame) for frame in frames]
+        if self.assets.disk:
+            self.assets.disk.store(self._disk_key(job), surfaces)
+        return surfaces
+
+    def _disk_key(self, job: PreprocessJob) -> str:
+        assert self.assets.disk is not None
+        return self.assets.disk.key(job.func.__name__, (job.path,), **job.params)
+
+    def _finish(self) -> None:
+        # Nothing left to load, the pool is started again for the next request
+        self._shutdown()
+        disk = self.assets.disk
+        pruned = 0
+        if disk and not self.pruned:
+            pruned = disk.prune()
+            self.pruned = True
+        logger.info(
+            f"sys.preprocess.finish: assets={self.assets.stats()} disk_cache={disk.stats() if disk else None} pruned={pruned}"
+        )
+
+    def _shutdown(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
     def _progress(self, message: str = "", visible: bool = True) -> None:
         widget_message = next(self.entities.get_by_class(WidgetSysMessage))
         if widget_message is not None:
             widget_message.fade_target_alpha = 255 if visible else 0
             widget_message.sprite = build_system_message_sprite(message)
 
-    def tasks(self) -> Generator:
+    def build_jobs(self) -> List[PreprocessJob]:
+        sprites = self.app_state.config.paths.images_sprites
+        jobs = []
         # Animated Duck
-        preprocess_load_spritesheet(
-            self.cache,
-            "duck_animated",
-            f"{self.app_state.config.paths.images_sprites}/ducky/spritesheet.png",
-            (32, 32),
-            (6, 12),
-        )
-        yield "Animated Duck"
-        # Mode7 Vinyl
-        surface = load_image(
-            f"{self.app_state.config.paths.images_sprites}/misc/vinyl.png"
+        jobs.append(
+            PreprocessJob(
+                "duck_animated",
+                "Animated Duck",
+                preprocess_load_spritesheet,
+                f"{sprites}/ducky/spritesheet.png",
+                dict(size=(32, 32), tile_range=(6, 12)),
+            )
         )
-        for r in range(1, 360, 5):
-            preprocess_mode7(
-                self.cache,
+        # Mode7 textures, rotated as they are displayed
+        jobs.append(
+            PreprocessJob(
                 "mode7_vinyl",
-                surface,
-                (
-                    self.display_info.current_w,
-                    self.display_info.current_h * 2,
-                ),
-                0.12,
-                0 - r,
-                0.8,
+                "Vinyl #1",
+                preprocess_load_texture,
+                f"{sprites}/misc/vinyl.png",
             )
-            yield f"Vinyl #1 [{r/360*100:.0f}%]"
-        # Mode7 Milky Way
-        surface = load_image(
-            f"{self.app_state.config.paths.images_sprites}/misc/milky_way.png"
         )
-        for r in range(1, 360, 2):
-            preprocess_mode7(
-                self.cache,
+        jobs.append(
+            PreprocessJob(
                 "mode7_milky_way",
-                surface,
-                (
-                    self.display_info.current_w,
-                    self.display_info.current_h,
-                ),
-                0.1,
-                0 - r,
-                0.6,
+                "Milky Way",
+                preprocess_load_texture,
+                f"{sprites}/misc/milky_way.png",
             )
-            yield f"Milky Way [{r/360*100:.0f}%]"
-        # Animated GIF Test
-        preprocess_load_gif(
-            self.cache,
-            "gif_test",
-            f"{self.app_state.config.paths.images_sprites}/misc/gif_cyberpunk.gif",
-        )
-        yield "Animated GIF Test"
-        # GIF: Monolith (Stable Diffusion)
-        preprocess_load_gif(
-            self.cache,
-            "gif_diffusion_monolith",
-            f"{self.app_state.config.paths.images_sprites}/diffusion/monolith.gif",
         )
-        yield "Monolith"
-        # GIF: Border Terriers (Stable Diffusion)
-        preprocess_load_gif(
-            self.cache,
-            "gif_diffusion_border_terriers",
-            f"{self.app_state.config.paths.images_sprites}/diffusion/border_terriers.gif",
-        )
-        yield "Border Terriers"
-        # GIF: Neon City (Stable Diffusion)
-        preprocess_load_gif(
-            self.cache,
-            "gif_diffusion_neon_city",
-            f"{self.app_state.config.paths.images_sprites}/diffusion/neon_city.gif",
+        # Animated GIF Test
+        jobs.append(
+            PreprocessJob(
+                "gif_test",
+                "Animated GIF Test",
+                preprocess_load_gif,
+                f"{sprites}/misc/gif_cyberpunk.gif",
+                compact=True,
+            )
         )
-        yield "Neon City"
+        return jobs
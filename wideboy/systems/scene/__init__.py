@@ -3,18 +3,19 @@ import random
 from ecs_pattern import EntityManager, System, entity
 from pygame import Color
 from pygame.display import Info as DisplayInfo
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Type
 from ...consts import EventTypes
 from ...entities import (
     AppState,
-    Cache,
     WidgetClockBackground,
     WidgetClockDate,
     WidgetClockTime,
     WidgetSysMessage,
     WidgetTileGrid,
 )
+from ...jobs import JOB_PRIORITY_HIGH
 from ...sprites.common import build_rect_sprite
+from ...sprites.tile_grid import TileGrid
 from .entity_tiles import CELLS
 from .stages import Stage
 from .stages.boot import StageBoot
@@ -40,6 +41,17 @@ def random_color():
 
 CLOCK_WIDTH = 110
 
+STAGES: Dict[str, Type[Stage]] = {
+    "city": StageCity,
+    "diffusion": StageDiffusion,
+    "galaxy": StageGalaxy,
+    "vinyl": StageVinyl,
+}
+
+
+def stage_for_mode(scene_mode: Optional[str]) -> Type[Stage]:
+    return STAGES.get(scene_mode or "", StageDefault)
+
 
 class SysScene(System):
     entities: EntityManager
@@ -47,6 +59,9 @@ class SysScene(System):
     scene_mode: Optional[str]
     stage: Optional[Stage] = None
     stage_entities: List[entity] = []
+    stage_pending: Optional[Type[Stage]] = None  # waiting on its assets
+    stage_waiting: bool = False
+    standby: bool = False
 
     def __init__(self, entities: EntityManager) -> None:
         self.entities = entities
@@ -59,7 +74,6 @@ class SysScene(System):
         self.entities.init()
         self.stage_entities = []
         self.app_state = next(self.entities.get_by_class(AppState))
-        self.cache = next(self.entities.get_by_class(Cache))
 
         clock_x = self.display_info.current_w - CLOCK_WIDTH
         clock_y = 2
@@ -105,33 +119,56 @@ class SysScene(System):
         )
 
     def update(self) -> None:
+        # Standby: state keeps being ingested, but the stage is frozen
+        if not self.app_state.master_power:
+            self.standby = True
+            return
+        if self.standby:
+            self._resume()
         self._handle_scene_mode_change()
         self._update_stage()
         self._update_core_widgets()
 
-    def _update_core_widgets(self) -> None:
-        app_state = next(self.entities.get_by_class(AppState))
+    def _resume(self) -> None:
+        logger.info("sys.scene.resume: power restored")
+        self.standby = False
+        # Tile and clock updates were skipped while in standby, rebuild them
+        next(self.entities.get_by_class(WidgetTileGrid)).sprite.invalidate()
+        self._update_clock()
 
-        # logger.debug(f"sys.scene.update: events={len(self.app_state.events)}")
+    def _update_clock(self) -> None:
+        app_state = self.app_state
         widget_clock_date = next(self.entities.get_by_class(WidgetClockDate))
         widget_clock_time = next(self.entities.get_by_class(WidgetClockTime))
-        widget_tilegrid = next(self.entities.get_by_class(WidgetTileGrid))
 
         time_fmt = "%H:%M" if app_state.clock_24_hour else "%l:%M %p"
         date_fmt = "%a %d %b"
 
+        widget_clock_time.sprite = build_time_sprite(
+            app_state.time_now.strftime(time_fmt),
+            night=app_state.scene_mode == "night",
+        )
+        widget_clock_date.sprite = build_date_sprite(
+            app_state.time_now.strftime(date_fmt),
+            night=app_state.scene_mode == "night",
+        )
+
+    def _update_core_widgets(self) -> None:
+        # logger.debug(f"sys.scene.update: events={len(self.app_state.events)}")
+        widget_tilegrid = next(self.entities.get_by_class(WidgetTileGrid))
+
         for event_type, event_payload in self.app_state.events:
             if event_type == EventTypes.EVENT_CLOCK_NEW_SECOND:
-                widget_clock_time.sprite = build_time_sprite(
-                    app_state.time_now.strftime(time_fmt),
-                    night=app_state.scene_mode == "night",
-                )
-                widget_clock_date.sprite = build_date_sprite(
-                    app_state.time_now.strftime(date_fmt),
-                    night=app_state.scene_mode == "night",
-                )
+                self._update_clock()
             if event_type == EventTypes.EVENT_HASS_ENTITY_UPDATE:
-                widget_tilegrid.sprite.update(event_payload["entity_id"])
+                # Rendered after the frame's systems, only the latest state matters
+                entity_id = event_payload["entity_id"]
+                self.app_state.jobs.submit(
+                    self._render_tile(widget_tilegrid.sprite, entity_id),
+                    "scene.tile",
+                    JOB_PRIORITY_HIGH,
+                    key=f"tile.{entity_id}",
+                )
 
         widget_tilegrid.x = (
             self.display_info.current_w
@@ -140,6 +177,10 @@ class SysScene(System):
         )
         widget_tilegrid.sprite.update()
 
+    def _render_tile(self, tile_grid: TileGrid, entity_id: str) -> Iterator[None]:
+        tile_grid.render_cell(entity_id)
+        yield
+
     def _update_stage(self) -> None:
         if self.stage is not None:
             self.stage.update()
@@ -157,6 +198,7 @@ class SysScene(System):
             )
             if self.app_state.booting:
                 logger.info("BOOT MODE")
+                self.stage_pending = None
                 self._switch_stage(
                     StageBoot(
                         self.entities,
@@ -164,53 +206,40 @@ class SysScene(System):
                     )
                 )
             else:
-                # City Stage
-                if self.scene_mode == "city":
-                    logger.info("CITY STAGE")
-                    self._switch_stage(
-                        StageCity(
-                            self.entities,
-                            (self.display_info.current_w, self.display_info.current_h),
-                        )
-                    )
-                # Diffusion Stage
-                elif self.scene_mode == "diffusion":
-                    logger.info("DIFFUSION STAGE")
-                    self._switch_stage(
-                        StageDiffusion(
-                            self.entities,
-                            (self.display_info.current_w, self.display_info.current_h),
-                        )
-                    )
-                # Galaxy Stage
-                elif self.scene_mode == "galaxy":
-                    logger.info("GALAXY STAGE")
-                    self._switch_stage(
-                        StageGalaxy(
-                            self.entities,
-                            (self.display_info.current_w, self.display_info.current_h),
-                        )
-                    )
-                # Vinyl Stage
-                elif self.scene_mode == "vinyl":
-                    logger.info("VINYL STAGE")
-                    self._switch_stage(
-                        StageVinyl(
-                            self.entities,
-                            (self.display_info.current_w, self.display_info.current_h),
-                        )
-                    )
-                # Default Stage
-                else:
-                    logger.info("DEFAULT STAGE")
-                    self._switch_stage(
-                        StageDefault(
-                            self.entities,
-                            (self.display_info.current_w, self.display_info.current_h),
-                        )
-                    )
+                self.stage_pending = stage_for_mode(self.scene_mode)
+        if self.stage_pending is not None:
+            self._switch_pending_stage()
+
+    def _switch_pending_stage(self) -> None:
+        stage_class = self.stage_pending
+        assert stage_class is not None
+        widget_message = next(self.entities.get_by_class(WidgetSysMessage))
+        # Assets still loading in the background: keep the current stage and
+        # show a placeholder message until they are ready
+        assets = self.app_state.assets
+        if not assets.ready(stage_class.assets):
+            assets.request(stage_class.assets)
+            if not self.stage_waiting:
+                logger.info(f"sys.scene.stage.wait: stage={stage_class.__name__}")
+                self.stage_waiting = True
+                widget_message.sprite = build_system_message_sprite("Loading...")
+                widget_message.fade_target_alpha = 255
+            return
+        if self.stage_waiting:
+            self.stage_waiting = False
+            widget_message.fade_target_alpha = 0
+        self.stage_pending = None
+        logger.info(f"sys.scene.stage: stage={stage_class.__name__}")
+        self._switch_stage(
+            stage_class(
+                self.entities,
+                (self.display_info.current_w, self.display_info.current_h),
+            )
+        )
 
     def _switch_stage(self, stage: Stage) -> None:
+        if self.stage is not None:
+            self.stage.teardown()
         self.entities.delete_buffer_add(*self.stage_entities)
         self.stage = stage
         self.entities.add(*self.stage.stage_entities)
@@ -219,6 +219,21 @@ class StateLogButton(ButtonEntity):
         logger.info(f"app_state: {app_state}")
 
 
+class ProfilerLogButton(ButtonEntity):
+    name: str = "profiler_log"
+    description: str = "Log Profile"
+
+    def callback(
+        self,
+        client: MQTTClient,
+        app_state: AppState,
+        state_topic: str,
+        payload: str,
+    ) -> None:
+        logger.debug("sys.hass.entities.button.profiler_log: press")
+        app_state.profiler.log_summary()
+
+
 class ScreenshotButton(ButtonEntity):
     name: str = "screenshot"
     description: str = "Screenshot"
@@ -242,5 +257,6 @@ ENTITIES = [
     BackgroundIntervalNumber,
     MessageText,
     StateLogButton,
+    ProfilerLogButton,
     ScreenshotButton,
 ]
@@ -1,17 +1,39 @@
 from ecs_pattern import EntityManager, entity
-from typing import List
+from pygame import Surface
+from typing import List, Sequence, Tuple
+from ....assets import AssetManager
+from ....entities import AppState
 
 
 class Stage:
     entities: EntityManager
     stage_entities: List[entity]
+    # Asset keys that must be loaded before the stage can be shown
+    assets: Tuple[str, ...] = ()
+    acquired: List[str]
 
     def __init__(self, entities: EntityManager, *args, **kwargs) -> None:
         self.entities = entities
         self.stage_entities = []
+        self.acquired = []
 
     def setup(self) -> None:
         pass
 
     def update(self, *args, **kwargs) -> None:
         pass
+
+    def acquire(self, key: str) -> Sequence[Surface]:
+        # Held until teardown(), so the asset manager won't evict it
+        assets: AssetManager = next(self.entities.get_by_class(AppState)).assets
+        frames = assets.acquire(key)
+        self.acquired.append(key)
+        if frames is None:
+            raise KeyError(f"Asset not loaded: {key}")
+        return frames
+
+    def teardown(self) -> None:
+        assets = next(self.entities.get_by_class(AppState)).assets
+        for key in self.acquired:
+            assets.release(key)
+        self.acquired = []
@@ -2,12 +2,12 @@ import logging
 from ecs_pattern import EntityManager
 from typing import Tuple
 from ....entities import (
-    Cache,
     WidgetAnimatedGif,
     WidgetClockDate,
     WidgetClockTime,
     WidgetTileGrid,
 )
+from ....sprites.frame_set import frames_instance
 from ..sprites import build_image_sprite
 from . import Stage
 
@@ -15,6 +15,8 @@ logger = logging.getLogger(__name__)
 
 
 class StageCity(Stage):
+    assets = ("gif_test",)
+
     def __init__(
         self,
         entities: EntityManager,
@@ -25,16 +27,18 @@ class StageCity(Stage):
         self.setup()
 
     def setup(self) -> None:
-        self.cache = next(self.entities.get_by_class(Cache))
+        frames = self.acquire("gif_test")
 
         for i in range(3):
+            # Each decodes its own frames, if they're stored compactly
+            instance = frames_instance(frames)
             self.stage_entities.append(
                 WidgetAnimatedGif(
-                    build_image_sprite(self.cache.surfaces["gif_test"][0]),
+                    build_image_sprite(instance[0]),
                     x=i * 300,
                     y=-20,
                     z_order=5,
-                    frames=self.cache.surfaces["gif_test"],
+                    frames=instance,
                     frame_delay=1,
                 ),  # type: ignore[call-arg]
             )
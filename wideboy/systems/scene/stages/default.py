@@ -1,21 +1,21 @@
 import logging
 import random
 from ecs_pattern import EntityManager
-from pathlib import Path
-from pygame import Color, Surface
-from typing import List, Tuple
+from pygame import Surface
+from typing import Tuple
+from ....backgrounds import BackgroundLibrary
 from ....consts import EventTypes
 from ....entities import (
     AppState,
-    Cache,
     WidgetClockDate,
     WidgetClockTime,
     WidgetDucky,
     WidgetSlideshow,
     WidgetTileGrid,
 )
-from ....sprites.graphics import load_image, recolor_image
+from ....sprites.frame_set import frames_instance
 from ....sprites.slideshow import Transition
+from ....sprites.slideshow.prefetch import SlideshowPrefetcher, Tint, prepare_slide
 from ..sprites import build_image_sprite, build_slideshow_sprite
 from . import Stage
 
@@ -24,8 +24,10 @@ logger = logging.getLogger(__name__)
 
 
 class StageDefault(Stage):
-    slideshow_images: List[Path] = []
+    assets = ("duck_animated",)
     slideshow_timer: int = 0
+    library: BackgroundLibrary
+    prefetcher: SlideshowPrefetcher
 
     def __init__(
         self,
@@ -39,15 +41,26 @@ class StageDefault(Stage):
 
     def setup(self) -> None:
         self.app_state = next(self.entities.get_by_class(AppState))
-        self.cache = next(self.entities.get_by_class(Cache))
+        frames = frames_instance(self.acquire("duck_animated"))
 
         self.slideshow_timer = self.app_state.slideshow_interval
-        self._glob_backgrounds(randomize=True)
-
-        # Add slideshow widget
-        slideshow_image = self._load_and_process_image(
-            self.slideshow_images[self.app_state.slideshow_index]
-        )
+        self.slideshow_ahead = self.app_state.config.slideshow.prefetch
+        # Picks up new and changed images in the background
+        assert self.app_state.backgrounds is not None
+        self.library = self.app_state.backgrounds
+        self.library.refresh()
+
+        # Add slideshow widget, the following images are prepared in the background
+        path = self.library.deal()
+        if path is not None:
+            slideshow_image = prepare_slide(
+                path, self.display_size, self._tint()
+            ).convert_alpha()
+        else:
+            # Nothing indexed yet, the first scan is still running
+            slideshow_image = Surface(self.display_size)
+        self.prefetcher = SlideshowPrefetcher(self.display_size, self._tint())
+        self.prefetcher.want(self.library.peek(self.slideshow_ahead))
         self.stage_entities.append(
             WidgetSlideshow(
                 build_slideshow_sprite(slideshow_image, self.display_size),
@@ -58,7 +71,7 @@ class StageDefault(Stage):
 
         self.stage_entities.append(
             WidgetDucky(
-                build_image_sprite(self.cache.surfaces["duck_animated"][0]),
+                build_image_sprite(frames[0]),
                 x=0,
                 y=self.display_size[1] - 32,
                 z_order=5,
@@ -70,7 +83,7 @@ class StageDefault(Stage):
                     self.display_size[1],
                 ),
                 bound_size=(32, 32),
-                frames=self.cache.surfaces["duck_animated"],
+                frames=frames,
                 frame_delay=4,
             ),  # type: ignore[call-arg]
         )
@@ -91,41 +104,40 @@ class StageDefault(Stage):
                 self.slideshow_timer -= 1
                 if self.slideshow_timer <= 0:
                     logger.debug("sys.scene.stage.default.slideshow: advance")
-                    self.advance()
-                    self.slideshow_timer = self.app_state.slideshow_interval
+                    # If the image isn't prepared yet, retry next second
+                    if self.advance():
+                        self.slideshow_timer = self.app_state.slideshow_interval
 
         widget_slideshow.sprite.update()
 
-    def advance(self) -> None:
+    def advance(self) -> bool:
         widget_slideshow = next(self.entities.get_by_class(WidgetSlideshow))
-        self.app_state.slideshow_index += 1
-        if self.app_state.slideshow_index >= len(self.slideshow_images):
-            self.app_state.slideshow_index = 0
-        next_image = self._load_and_process_image(
-            self.slideshow_images[self.app_state.slideshow_index]
+        upcoming = self.library.peek(self.slideshow_ahead)
+        next_image = (
+            self.prefetcher.take(upcoming[0], self._tint()) if upcoming else None
         )
+        if next_image is None:
+            self.prefetcher.want(upcoming)
+            return False
+        self.library.deal()
+        self.prefetcher.want(self.library.peek(self.slideshow_ahead))
         widget_slideshow.sprite.set_next_image(next_image)
         widget_slideshow.sprite.swap(
             random.choice([Transition.FADE, Transition.WIPE, Transition.FOLD])
         )
+        return True
 
-    def _glob_backgrounds(self, randomize: bool = False) -> None:
-        app_state = next(self.entities.get_by_class(AppState))
-        images = list(Path(app_state.config.paths.images_backgrounds).glob("*.png"))
-        if randomize:
-            random.shuffle(images)
-        self.slideshow_images = images
+    def teardown(self) -> None:
+        super().teardown()
+        self.prefetcher.close()
 
-    def _load_and_process_image(self, filename: str) -> Surface:
-        tint_enabled = self.app_state.tint_enabled
+    def _tint(self) -> Tint:
+        if not self.app_state.tint_enabled:
+            return None
         color = self.app_state.tint_color
         brightness = self.app_state.tint_brightness
-        color = Color(
-            color[0] * brightness / 255,
-            color[1] * brightness / 255,
-            color[2] * brightness / 255,
+        return (
+            int(color[0] * brightness / 255),
+            int(color[1] * brightness / 255),
+            int(color[2] * brightness / 255),
         )
-        surface = load_image(filename)
-        if tint_enabled:
-            surface = recolor_image(surface, color)
-        return surface
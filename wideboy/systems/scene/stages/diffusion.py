@@ -1,28 +1,31 @@
 import logging
 from ecs_pattern import EntityManager
+from pygame import Surface, SRCALPHA
 from typing import Tuple
 from ....consts import EventTypes
 from ....entities import (
     AppState,
-    Cache,
     WidgetAnimatedGif,
     WidgetClockDate,
     WidgetClockTime,
     WidgetTileGrid,
 )
+from ....sprites.gif_stream import GifStream
 from ..sprites import build_image_sprite
 from . import Stage
 
 logger = logging.getLogger(__name__)
 
-IMAGE_CACHE_KEYS = [
-    "gif_diffusion_border_terriers",
-    "gif_diffusion_monolith",
-    "gif_diffusion_neon_city",
+GIF_FILENAMES = [
+    "border_terriers.gif",
+    "monolith.gif",
+    "neon_city.gif",
 ]
 
 
 class StageDiffusion(Stage):
+    # GIFs are streamed from disk rather than loaded as assets
+
     def __init__(
         self,
         entities: EntityManager,
@@ -34,20 +37,17 @@ class StageDiffusion(Stage):
 
     def setup(self) -> None:
         self.app_state = next(self.entities.get_by_class(AppState))
-        self.cache = next(self.entities.get_by_class(Cache))
-        self.cache_keys = IMAGE_CACHE_KEYS
-        self.cache_index = 0
+        self.gif_index = 0
+        self.gif_stream = self._open_stream()
 
         self.stage_entities.append(
             WidgetAnimatedGif(
-                build_image_sprite(
-                    self.cache.surfaces[self.cache_keys[self.cache_index]][0]
-                ),
+                # Placeholder until the first frame is decoded
+                build_image_sprite(Surface((1, 1), SRCALPHA)),
                 x=0,
                 y=0,
                 z_order=5,
-                frames=self.cache.surfaces[self.cache_keys[self.cache_index]],
-                frame_delay=2,
+                frame_stream=self.gif_stream,
             ),  # type: ignore[call-arg]
         )
 
@@ -62,10 +62,18 @@ class StageDiffusion(Stage):
         widget_animated_gif = next(self.entities.get_by_class(WidgetAnimatedGif))
         for event_type, event_payload in self.app_state.events:
             if event_type == EventTypes.EVENT_CLOCK_NEW_MINUTE:
-                self.cache_index += 1
-                if self.cache_index >= len(self.cache_keys):
-                    self.cache_index = 0
-                widget_animated_gif.frames = self.cache.surfaces[
-                    self.cache_keys[self.cache_index]
-                ]
-                widget_animated_gif.frame_index = 0
+                self.gif_index += 1
+                if self.gif_index >= len(GIF_FILENAMES):
+                    self.gif_index = 0
+                self.gif_stream.close()
+                self.gif_stream = self._open_stream()
+                widget_animated_gif.frame_stream = self.gif_stream
+                widget_animated_gif.frame_elapsed = 0.0
+
+    def teardown(self) -> None:
+        super().teardown()
+        self.gif_stream.close()
+
+    def _open_stream(self) -> GifStream:
+        path = f"{self.app_state.config.paths.images_sprites}/diffusion/{GIF_FILENAMES[self.gif_index]}"
+        return GifStream(path)
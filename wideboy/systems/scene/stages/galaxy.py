@@ -2,19 +2,20 @@ import logging
 from ecs_pattern import EntityManager
 from typing import Tuple
 from ....entities import (
-    Cache,
     WidgetClockDate,
     WidgetClockTime,
     WidgetGalaxy,
     WidgetTileGrid,
 )
-from ..sprites import build_image_sprite
+from ..sprites import build_mode7_sprite
 from . import Stage
 
 logger = logging.getLogger(__name__)
 
 
 class StageGalaxy(Stage):
+    assets = ("mode7_milky_way",)
+
     def __init__(
         self,
         entities: EntityManager,
@@ -25,17 +26,22 @@ class StageGalaxy(Stage):
         self.setup()
 
     def setup(self) -> None:
-        self.cache = next(self.entities.get_by_class(Cache))
+        texture = self.acquire("mode7_milky_way")[0]
 
         self.stage_entities.extend(
             [
                 WidgetGalaxy(
-                    build_image_sprite(self.cache.surfaces["mode7_milky_way"][0]),
+                    build_mode7_sprite(
+                        texture,
+                        self.display_size,
+                        perspective=0.1,
+                        rotation=0,
+                        zoom=0.6,
+                    ),
                     x=0,
                     y=0,
                     z_order=5,
-                    frames=self.cache.surfaces["mode7_milky_way"],
-                    frame_delay=2,
+                    rotation_speed=-1,
                 ),  # type: ignore[call-arg]
             ]
         )
@@ -2,19 +2,19 @@ import logging
 from ecs_pattern import EntityManager
 from typing import Tuple
 from ....entities import (
-    Cache,
     WidgetClockDate,
     WidgetClockTime,
     WidgetVinyl,
     WidgetTileGrid,
 )
-from ..sprites import build_image_sprite
+from ..sprites import build_mode7_sprite
 from . import Stage
 
 logger = logging.getLogger(__name__)
 
 
 class StageVinyl(Stage):
+    assets = ("mode7_vinyl",)
     image_count: int
 
     def __init__(
@@ -27,17 +27,22 @@ class StageVinyl(Stage):
         self.setup()
 
     def setup(self) -> None:
-        self.cache = next(self.entities.get_by_class(Cache))
+        texture = self.acquire("mode7_vinyl")[0]
 
         self.stage_entities.extend(
             [
                 WidgetVinyl(
-                    build_image_sprite(self.cache.surfaces["mode7_vinyl"][0]),
+                    build_mode7_sprite(
+                        texture,
+                        (self.display_size[0], self.display_size[1] * 2),
+                        perspective=0.12,
+                        rotation=0,
+                        zoom=0.8,
+                    ),
                     x=-150,
                     y=-15,
                     z_order=5,
-                    frames=self.cache.surfaces["mode7_vinyl"],
-                    frame_delay=1,
+                    rotation_speed=-5,
                 ),  # type: ignore[call-arg]
             ]
         )
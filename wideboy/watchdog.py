@@ -0,0 +1,111 @@
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+STALL_LOG_MAX_BYTES = 1024 * 1024
+STALL_LOG_BACKUPS = 3
+
+
+def build_stall_logger(filename: str) -> logging.Logger:
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stall_logger = logging.getLogger(f"{__name__}.stalls")
+    stall_logger.propagate = False
+    stall_logger.setLevel(logging.INFO)
+    handler = RotatingFileHandler(
+        filename, maxBytes=STALL_LOG_MAX_BYTES, backupCount=STALL_LOG_BACKUPS
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    stall_logger.addHandler(handler)
+    return stall_logger
+
+
+class FrameWatchdog:
+    """Background thread that reports frames running over budget.
+
+    The main loop brackets each frame's work with frame_start()/frame_end().
+    If a frame is still running after `budget` seconds, the main thread's stack
+    and the system being updated are written to a rotating stall log, then the
+    total stall duration once the frame completes.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        log_file: str,
+        current_system: Callable[[], Optional[str]] = lambda: None,
+    ) -> None:
+        self.budget = budget
+        self.log_file = log_file
+        self.current_system = current_system
+        self.main_thread_id = threading.main_thread().ident
+        self.frame_started: Optional[float] = None
+        self.frame_index = 0
+        self.stalled_frame = -1
+        self.stalls = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stall_logger: Optional[logging.Logger] = None
+
+    def start(self) -> None:
+        self._stall_logger = build_stall_logger(self.log_file)
+        self._thread = threading.Thread(
+            target=self._run, name="wideboy-watchdog", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"watchdog.start: budget={self.budget * 1000:.0f}ms log={self.log_file}"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def frame_start(self) -> None:
+        self.frame_index += 1
+        self.frame_started = time.monotonic()
+
+    def frame_end(self) -> None:
+        started = self.frame_started
+        self.frame_started = None
+        if started is not None and self.stalled_frame == self.frame_index:
+            self._log(
+                f"stall.end: frame={self.frame_index} duration={(time.monotonic() - started) * 1000:.0f}ms"
+            )
+
+    def _run(self) -> None:
+        interval = self.budget / 4
+        while not self._stop.wait(interval):
+            started = self.frame_started
+            frame_index = self.frame_index
+            if started is None or self.stalled_frame == frame_index:
+                continue
+            elapsed = time.monotonic() - started
+            if elapsed >= self.budget:
+                self.stalled_frame = frame_index
+                self.stalls += 1
+                self._report(frame_index, elapsed)
+
+    def _report(self, frame_index: int, elapsed: float) -> None:
+        frame = sys._current_frames().get(self.main_thread_id)  # type: ignore[arg-type]
+        stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>\n"
+        system = self.current_system() or "main loop"
+        logger.warning(
+            f"watchdog.stall: frame={frame_index} elapsed={elapsed * 1000:.0f}ms system={system}"
+        )
+        self._log(
+            f"stall.start: frame={frame_index} elapsed={elapsed * 1000:.0f}ms system={system}\n{stack}"
+        )
+
+    def _log(self, message: str) -> None:
+        if self._stall_logger is not None:
+            self._stall_logger.info(message)